@@ -0,0 +1,62 @@
+import sys
+import timeit
+import multiprocessing
+from multiprocessing.connection import wait
+from main import CFFSATSolver, _run_solver_pipe, _run_outcome
+
+
+METHODS = ['CreateClausesDisjunctMatrices', 'CreateClausesLogDisjunctMatrices',
+           'CreateClausesWeightedK', 'CreateClausesCyclicConstruction']
+
+
+def benchmark(method, k, d, t, n, solver_name='glucose4', timeout=60):
+    """
+    Size (vars, clauses, literals from EstimateSize) and one solver run of an
+    encoding, without touching the result store. The time covers streaming the
+    clauses into the solver and solving, in a worker process killed at timeout.
+    """
+    cff = CFFSATSolver(k, d, t, n)
+    cff.methodName = method
+    estimate = cff.EstimateSize()
+
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    p = multiprocessing.Process(target=_run_solver_pipe, args=(solver_name, cff.EncodingSpec(), sender),
+                                name=solver_name, daemon=True)
+    start = timeit.default_timer()
+    p.start()
+    sender.close()
+    if wait([receiver], timeout=timeout):
+        try:
+            _, sol, model_or_error, _, elapsed = receiver.recv()
+            outcome = _run_outcome(sol, model_or_error)
+        except EOFError:
+            outcome, elapsed = 'ERROR', timeit.default_timer() - start
+        if outcome == 'SAT':
+            cff.solutionExists.value = 1.0
+            cff.solution = model_or_error[:n * t]
+            if not cff.VerifySolution(cff.SolutionBlocks()):
+                outcome = 'INVALID'
+    else:
+        outcome, elapsed = 'TIMEOUT', timeit.default_timer() - start
+    if p.is_alive():
+        p.terminate()
+    p.join()
+    receiver.close()
+
+    return {'method': method, 'vars': estimate['vars'], 'clauses': estimate['clauses'],
+            'literals': estimate['literals'], 'outcome': outcome, 'time': elapsed}
+
+
+if __name__ == '__main__':
+    # python benchmark.py d t n [k] [timeout]
+    if len(sys.argv) not in (4, 5, 6):
+        print("Usage:")
+        print("  python benchmark.py <d> <t> <n> [k] [timeout]")
+        sys.exit(1)
+    d, t, n = int(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3])
+    k = int(sys.argv[4]) if len(sys.argv) >= 5 else n
+    timeout = float(sys.argv[5]) if len(sys.argv) == 6 else 60
+    print(f"{'method':<36}{'vars':>10}{'clauses':>12}{'literals':>12}  {'outcome':<12}{'time':>8}")
+    for method in METHODS:
+        r = benchmark(method, k, d, t, n, timeout=timeout)
+        print(f"{r['method']:<36}{r['vars']:>10}{r['clauses']:>12}{r['literals']:>12}  {r['outcome']:<12}{r['time']:>8.2f}")
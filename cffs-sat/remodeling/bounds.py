@@ -0,0 +1,61 @@
+import math
+import sys
+
+
+def own_subset_bound(d, t):
+    """
+    Every column B of a d-CFF has an own subset, contained in no other column,
+    of any size s between ceil(|B| / d) and |B| (split B into d parts: if each
+    were in another column, B would be covered). One own subset per column
+    gives an antichain, so by the LYM inequality n is at most the largest, over
+    the column sizes w, of the smallest C(t, s) with s in that range. For d = 1
+    this is Sperner's bound C(t, t // 2).
+    """
+    return max(min(math.comb(t, s) for s in range(math.ceil(w / d), w + 1))
+               for w in range(1, t + 1))
+
+
+def bassalygo_bound(d, t):
+    """
+    Bassalygo: a d-CFF with more columns than rows has at least C(d + 2, 2)
+    rows, so below that n <= t. None when it does not apply.
+    """
+    return t if t < math.comb(d + 2, 2) else None
+
+
+def row_weight_bound(d, t, k):
+    """
+    With rows of weight at most k: a column of at most d rows has a row of its
+    own (or the columns through its rows would cover it), and every other
+    column has at least d + 1 rows. Counting the ones, a columns with a row of
+    their own leave n <= a + k(t - a) / (d + 1), so n <= t when k <= d + 1 and
+    n <= kt / (d + 1) otherwise.
+    """
+    return max(t, k * t // (d + 1))
+
+
+def max_columns(d, t, k=None):
+    """
+    The smallest of the bounds above on the columns of a d-CFF with t rows (and
+    row weights at most k), as (bound, name). They only hold for n > d: with
+    n <= d columns the property asks nothing.
+    """
+    bounds = [(own_subset_bound(d, t), 'own_subset' if d > 1 else 'sperner')]
+    if bassalygo_bound(d, t) is not None:
+        bounds.append((bassalygo_bound(d, t), 'bassalygo'))
+    if k is not None:
+        bounds.append((row_weight_bound(d, t, k), 'row_weight'))
+    return min(bounds)
+
+
+if __name__ == '__main__':
+    # python bounds.py d t_max [k]
+    if len(sys.argv) not in (3, 4):
+        print("Usage:")
+        print("  python bounds.py <d> <t_max> [k]")
+        sys.exit(1)
+    d, t_max = int(sys.argv[1]), int(sys.argv[2])
+    k = int(sys.argv[3]) if len(sys.argv) == 4 else None
+    for t in range(1, t_max + 1):
+        bound, name = max_columns(d, t, k)
+        print(f"t: {t:<4d}n <= {bound:<10d}({name})")
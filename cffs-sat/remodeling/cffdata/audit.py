@@ -0,0 +1,77 @@
+import json
+import sys
+import os
+import re
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import is_cff, is_cyclic_cff
+
+
+def audit_file(input_file, folder_type):
+    """
+    Verify every stored solution of one data_k_*_d_*.json file against the
+    property of its method. Returns (checked, failures).
+    """
+    with open(input_file, "r") as f:
+        data = json.load(f)
+
+    checked = 0
+    failures = []
+    for entry in data:
+        sol = entry["solution"]
+        if not isinstance(sol, list) or len(sol) == 0:
+            continue
+        checked += 1
+        if folder_type == "CyclicConstruction":
+            ok = is_cyclic_cff(sol, entry["d"])
+        else:
+            ok = is_cff(sol, entry["d"])
+            if ok and folder_type == "WeightedK":
+                weights = {}
+                for block in sol:
+                    for row in block:
+                        weights[row] = weights.get(row, 0) + 1
+                ok = max(weights.values(), default=0) <= entry["k"]
+        if not ok:
+            failures.append((entry["k"], entry["d"], entry["t"], entry["n"]))
+
+    return checked, failures
+
+
+def run_all(folder_types):
+    pattern = re.compile(r"data_k_(\d+)_d_(\d+)\.json$")
+    start = time.time()
+    total = 0
+    bad = 0
+    for folder_type in folder_types:
+        folder = f"CreateClauses{folder_type}"
+        if not os.path.isdir(folder):
+            print(f"Error: folder {folder} does not exist")
+            continue
+        for fname in sorted(os.listdir(folder)):
+            if not pattern.match(fname):
+                continue
+            input_file = os.path.join(folder, fname)
+            checked, failures = audit_file(input_file, folder_type)
+            total += checked
+            bad += len(failures)
+            print(f"{input_file}: {checked} solutions, {len(failures)} invalid")
+            for k, d, t, n in failures:
+                print(f"\tinvalid: k={k} d={d} t={t} n={n}")
+
+    print(f"{total} solutions audited, {bad} invalid, {time.time() - start:.2f}s")
+    return bad == 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        ok = run_all([sys.argv[1]])
+    elif len(sys.argv) == 1:
+        ok = run_all(["DisjunctMatrices", "LogDisjunctMatrices", "WeightedK", "CyclicConstruction"])
+    else:
+        print("Usage:")
+        print("  python audit.py <Type>   # one folder")
+        print("  python audit.py          # every folder")
+        sys.exit(1)
+    sys.exit(0 if ok else 1)
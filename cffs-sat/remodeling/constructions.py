@@ -0,0 +1,163 @@
+import functools
+import itertools
+import sys
+from main import is_cff
+
+
+def identity(t):
+    """
+    The t x t identity: a d-CFF for every d.
+    """
+    return [[row] for row in range(1, t + 1)]
+
+
+def _primes(limit):
+    return [p for p in range(2, limit + 1) if all(p % q for q in range(2, int(p ** 0.5) + 1))]
+
+
+def polynomial(q, degree, points):
+    """
+    Reed-Solomon construction over GF(q), q prime: a row for every pair (x, y)
+    with x among the first `points` elements of the field, and a column for
+    every polynomial f of degree at most `degree`, holding the rows (x, f(x)).
+    Two columns share at most `degree` rows, so this is a d-CFF whenever
+    d * degree < points. t = points * q, n = q ** (degree + 1).
+    """
+    blocks = []
+    for coefficients in itertools.product(range(q), repeat=degree + 1):
+        blocks.append([x * q + sum(c * x ** i for i, c in enumerate(coefficients)) % q + 1
+                       for x in range(points)])
+    return blocks
+
+
+def steiner_triples(v):
+    """
+    Bose construction of a Steiner triple system on v = 6m + 3 points (rows
+    (x, i), x in Z_{2m+1}, i in Z_3): every pair of rows lies in exactly one of
+    the v(v - 1)/6 triples, so two columns share at most one row and the
+    triples are a 2-CFF.
+    """
+    order = v // 3
+    half = (order + 1) // 2  # x o y = (x + y) / 2, an idempotent commutative quasigroup
+    row = lambda x, i: 3 * x + i + 1
+    blocks = [[row(x, 0), row(x, 1), row(x, 2)] for x in range(order)]
+    for x, y in itertools.combinations(range(order), 2):
+        for i in range(3):
+            blocks.append(sorted([row(x, i), row(y, i), row((x + y) * half % order, (i + 1) % 3)]))
+    return blocks
+
+
+def packing(t, weight, overlap, limit=50000):
+    """
+    Greedy (lexicographic) packing: the weight-subsets of the t rows, in order,
+    each kept when it shares at most `overlap` rows with every subset kept
+    before; a d-CFF whenever d * overlap < weight. None when there are more
+    than `limit` subsets to go through.
+    """
+    total = 1
+    for i in range(weight):
+        total = total * (t - i) // (i + 1)
+    if total > limit:
+        return None
+    kept = []
+    for mask in map(sum, itertools.combinations([1 << row for row in range(t)], weight)):
+        for other in kept:
+            if bin(mask & other).count('1') > overlap:
+                break
+        else:
+            kept.append(mask)
+    return [[row + 1 for row in range(t) if mask >> row & 1] for mask in kept]
+
+
+@functools.lru_cache(maxsize=None)
+def candidates(d, t):
+    """
+    Every construction this module knows that is a d-CFF with exactly t rows,
+    as a list of (provenance, blocks); cached, every k and method of a sweep
+    starts from the same ones.
+    """
+    return list(_candidates(d, t))
+
+
+def _candidates(d, t):
+    yield {'name': 'identity'}, identity(t)
+    for q in _primes(t):
+        for degree in range(1, q):
+            points = d * degree + 1
+            if points <= q and points * q == t:
+                yield {'name': 'polynomial', 'q': q, 'degree': degree, 'points': points}, \
+                    polynomial(q, degree, points)
+    if d <= 2 and t % 6 == 3:
+        yield {'name': 'steiner_triples', 'v': t}, steiner_triples(t)
+    for overlap in range(1, t):
+        for weight in range(d * overlap + 1, t + 1):
+            blocks = packing(t, weight, overlap)
+            if blocks is None:
+                break
+            yield {'name': 'packing', 'weight': weight, 'overlap': overlap}, blocks
+
+
+def limit_row_weight(blocks, k):
+    """
+    The columns of `blocks` kept in order while no row is in more than k of them.
+    """
+    weights = {}
+    kept = []
+    for block in blocks:
+        if all(weights.get(row, 0) < k for row in block):
+            for row in block:
+                weights[row] = weights.get(row, 0) + 1
+            kept.append(block)
+    return kept
+
+
+@functools.lru_cache(maxsize=None)
+def _best(d, t, k):
+    # (parts, blocks) of the largest construction with t rows; memoised, so a
+    # sweep pays for each t once, when it first gets there.
+    found = None
+    for provenance, blocks in candidates(d, t):
+        if k is not None:
+            blocks = limit_row_weight(blocks, k)
+        if found is not None and len(blocks) <= len(found[1]):
+            continue
+        if is_cff(blocks, d):
+            found = ([dict(provenance, t=t, n=len(blocks))], blocks)
+    for split in range(1, t // 2 + 1):
+        left, right = _best(d, split, k), _best(d, t - split, k)
+        if len(left[1]) + len(right[1]) > len(found[1]):
+            shifted = [[row + split for row in block] for block in right[1]]
+            found = (left[0] + right[0], left[1] + shifted)
+    return found
+
+
+def best(d, t, k=None):
+    """
+    The largest d-CFF with t rows (and row weights at most k) that the
+    constructions give, as (provenance, blocks). Two d-CFFs on disjoint rows
+    combine block-diagonally into a d-CFF, so t also gets the best split of
+    its rows between smaller ones. Every candidate is checked with is_cff
+    before it is used.
+    """
+    parts, blocks = _best(d, t, k)
+    return {'parts': parts}, blocks
+
+
+def best_by_rows(d, t_max, k=None):
+    """
+    best(d, t, k) for every t up to t_max, as {t: (provenance, blocks)}.
+    """
+    return {t: best(d, t, k) for t in range(1, t_max + 1)}
+
+
+if __name__ == '__main__':
+    # python constructions.py d t_max [k]
+    if len(sys.argv) not in (3, 4):
+        print("Usage:")
+        print("  python constructions.py <d> <t_max> [k]")
+        sys.exit(1)
+    d, t_max = int(sys.argv[1]), int(sys.argv[2])
+    k = int(sys.argv[3]) if len(sys.argv) == 4 else None
+    for t, (provenance, blocks) in best_by_rows(d, t_max, k).items():
+        print(f"t: {t:<4d}n: {len(blocks):<6d}", ' + '.join(
+            f"{part['name']}({part['t']}x{part['n']})" for part in provenance['parts']))
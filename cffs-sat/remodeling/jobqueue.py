@@ -0,0 +1,286 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import timeit
+from main import CFFSATSolver, _solver_from_spec
+
+
+class JobQueue:
+    """
+    Directory-backed job queue shared by a coordinator and any number of
+    workers, on one machine or on several hosts mounting the same folder.
+
+    A job is a JSON file: published in pending/, claimed by renaming it into
+    claimed/ (the rename is atomic, so exactly one worker wins), and answered by
+    a result file in done/. A worker keeps its claim alive by touching the file;
+    a claim not touched for `lease` seconds belongs to a dead worker and is
+    moved back to pending/ by whoever notices first.
+    """
+
+    def __init__(self, folder, lease=30.0):
+        self.folder = folder
+        self.lease = lease
+        for sub in ('pending', 'claimed', 'done'):
+            os.makedirs(os.path.join(folder, sub), exist_ok=True)
+
+    def _path(self, sub, name):
+        return os.path.join(self.folder, sub, name)
+
+    @staticmethod
+    def JobName(spec):
+        return f"{spec['method']}_k_{spec['k']}_d_{spec['d']}_t_{spec['t']}_n_{spec['n']}.json"
+
+    def _write(self, path, data):
+        # Write next to the target and rename, so readers never see a partial file.
+        tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def Publish(self, job):
+        name = self.JobName(job['spec'])
+        self._write(self._path('pending', name), job)
+        return name
+
+    def Claim(self, worker):
+        """
+        Take the first pending job, or None. Returns (name, job).
+        """
+        for name in sorted(os.listdir(os.path.join(self.folder, 'pending'))):
+            if not name.endswith('.json'):
+                continue
+            try:
+                os.rename(self._path('pending', name), self._path('claimed', name))
+            except FileNotFoundError:
+                continue  # another worker was faster
+            try:
+                # The rename keeps the mtime of the pending file: start the lease now,
+                # or RequeueExpired would take back a job that waited longer than it.
+                os.utime(self._path('claimed', name))
+                with open(self._path('claimed', name), 'r') as f:
+                    job = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            job['worker'] = worker
+            self._write(self._path('claimed', name), job)
+            return name, job
+        return None
+
+    def Renew(self, name):
+        # False once the claim has been lost (its lease expired and it was re-queued).
+        try:
+            os.utime(self._path('claimed', name))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def Complete(self, name, result):
+        self._write(self._path('done', name), result)
+        try:
+            os.unlink(self._path('claimed', name))
+        except FileNotFoundError:
+            pass
+
+    def RequeueExpired(self):
+        """
+        Move the claims whose lease has expired back to pending/. Returns their names.
+        """
+        requeued = []
+        now = time.time()
+        for name in os.listdir(os.path.join(self.folder, 'claimed')):
+            if not name.endswith('.json'):
+                continue
+            try:
+                if now - os.path.getmtime(self._path('claimed', name)) <= self.lease:
+                    continue
+                os.rename(self._path('claimed', name), self._path('pending', name))
+                requeued.append(name)
+            except FileNotFoundError:
+                continue
+        return requeued
+
+    def Results(self):
+        """
+        Collect (and remove) the result files in done/, as (name, result) pairs.
+        """
+        results = []
+        for name in sorted(os.listdir(os.path.join(self.folder, 'done'))):
+            if not name.endswith('.json'):
+                continue
+            path = self._path('done', name)
+            with open(path, 'r') as f:
+                results.append((name, json.load(f)))
+            os.unlink(path)
+        return results
+
+    def Forget(self, name):
+        # Drop any other copy of an answered job (e.g. re-queued while being solved).
+        for sub in ('pending', 'claimed'):
+            try:
+                os.unlink(self._path(sub, name))
+            except FileNotFoundError:
+                pass
+
+    def Stop(self):
+        self._write(os.path.join(self.folder, 'STOP'), {})
+
+    def Stopped(self):
+        return os.path.exists(os.path.join(self.folder, 'STOP'))
+
+    def Start(self):
+        # Clear the STOP of a previous coordinator, so workers wait for new jobs.
+        try:
+            os.unlink(os.path.join(self.folder, 'STOP'))
+        except FileNotFoundError:
+            pass
+
+
+class Coordinator:
+    """
+    Publish the instances of the (method, k, d) sweeps as jobs, one outstanding
+    job per lane, and record the results the workers send back. Only the
+    coordinator touches the result store, so the store never needs to be on a
+    shared filesystem; instances it answers by itself (SolutionCached and
+    inference) are never published.
+    """
+
+    def __init__(self, queue, methods, ks=(1, 2, 3, 4, 5), ds=(2, 3), timeout=60,
+                 output_folder='cffdata', poll=1.0):
+        self.queue = queue
+        self.timeout = timeout
+        self.poll = poll
+        self.methods = methods
+        self.lanes = []
+        for method in methods:
+            for d in ds:
+                for k in ks:
+                    cff = CFFSATSolver(k, d)
+                    cff.timeout = timeout
+                    cff.outputFolder = output_folder
+                    cff._set_filename(method)
+                    self.lanes.append(cff)
+        # Outstanding job name -> lane.
+        self.outstanding = {}
+
+    def PublishNext(self, cff):
+        # Skip what the store already answers, then publish the lane's next instance.
+        while cff.t <= cff.maxRows:
+            cff.nclauses = None
+            if not cff.SolutionCached() and not cff.ExtendColumn():
+                phases = cff.WarmStartPhases()
+                cff.warmStarted = phases is not None
+                name = self.queue.Publish({'spec': cff.EncodingSpec(), 'timeout': self.timeout,
+                                           'portfolio': cff.PortfolioOrder(cff.defaultSolverNames),
+                                           'phases': phases})
+                self.outstanding[name] = cff
+                print("Published k:", cff.k, 'd:', cff.d, 't:', cff.t, 'n:', cff.n, 'method:', cff.methodName)
+                return
+            cff.NextInstance()
+
+    def Record(self, cff, result):
+        cff.solutionExists.value = result['value']
+        cff.solution = result['model'] or []
+        cff.nclauses = result['nclauses']
+        cff.time = result['time']
+        print('Result from', result['worker'], 'solver:', result['solver'])
+        cff.RecordSolverRuns([tuple(run) for run in result['runs']])
+        cff.PrintSolution()
+        cff.UpdateJson()
+        print()
+        cff.NextInstance()
+
+    def Run(self):
+        self.queue.Start()
+        for cff in self.lanes:
+            self.PublishNext(cff)
+        while self.outstanding:
+            for name in self.queue.RequeueExpired():
+                print('Lease expired, re-queued', name)
+            for name, result in self.queue.Results():
+                cff = self.outstanding.pop(name, None)
+                if cff is None:
+                    continue  # a duplicate answer to a re-queued job
+                self.queue.Forget(name)
+                self.Record(cff, result)
+                self.PublishNext(cff)
+            time.sleep(self.poll)
+        self.queue.Stop()
+        for method in self.methods:
+            next(cff for cff in self.lanes if cff.methodName == method).ExportJson()
+
+
+class Worker:
+    """
+    Claim jobs and race `solver_names` on each one until a solver answers or
+    the job's timeout runs out, renewing the lease in the background. The
+    solvers are launched in the order the coordinator ranked them by their
+    recorded runs, under the same memory caps and eviction as a local race
+    (CFFSATSolver.Race), and every run is reported back with the result.
+    """
+
+    def __init__(self, queue, solver_names=('glucose4',), poll=1.0):
+        self.queue = queue
+        self.solverNames = list(solver_names)
+        self.poll = poll
+        self.id = f"{socket.gethostname()}-{os.getpid()}"
+
+    def Heartbeat(self, name, done):
+        while not done.wait(self.queue.lease / 3):
+            if not self.queue.Renew(name):
+                print('Lease lost for', name)
+                return
+
+    def Solve(self, job):
+        spec = job['spec']
+        cff = _solver_from_spec(spec)
+        ranked = [name for name in job.get('portfolio', []) if name in self.solverNames]
+        names = ranked + [name for name in self.solverNames if name not in ranked]
+        concurrency = min(len(names), max(1, os.cpu_count() or 1))
+        start = timeit.default_timer()
+        value, model, solver, runs = cff.Race(names, spec, concurrency, start + job['timeout'], job.get('phases'))
+        return {'value': value, 'model': model[:spec['n'] * spec['t']] if model else None,
+                'nclauses': cff.nclauses, 'solver': solver,
+                'time': timeit.default_timer() - start, 'runs': runs}
+
+    def Run(self):
+        while True:
+            self.queue.RequeueExpired()
+            claimed = self.queue.Claim(self.id)
+            if claimed is None:
+                if self.queue.Stopped():
+                    return
+                time.sleep(self.poll)
+                continue
+
+            name, job = claimed
+            spec = job['spec']
+            print("Solving k:", spec['k'], 'd:', spec['d'], 't:', spec['t'], 'n:', spec['n'], 'method:', spec['method'])
+            done = threading.Event()
+            heartbeat = threading.Thread(target=self.Heartbeat, args=(name, done), daemon=True)
+            heartbeat.start()
+            try:
+                result = self.Solve(job)
+            finally:
+                done.set()
+                heartbeat.join()
+            result['worker'] = self.id
+            self.queue.Complete(name, result)
+
+
+if __name__ == '__main__':
+    # python jobqueue.py coordinator <CreateClausesMethodName> <queue folder> [timeout]
+    # python jobqueue.py worker <queue folder> [solver names...]
+    if len(sys.argv) in (4, 5) and sys.argv[1] == 'coordinator':
+        coordinator = Coordinator(JobQueue(sys.argv[3]), [sys.argv[2]],
+                                  timeout=float(sys.argv[4]) if len(sys.argv) == 5 else 600)
+        coordinator.Run()
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'worker':
+        Worker(JobQueue(sys.argv[2]), sys.argv[3:] or ['glucose4']).Run()
+    else:
+        print("Usage:")
+        print("  python jobqueue.py coordinator <CreateClausesMethodName> <queue folder> [timeout]")
+        print("  python jobqueue.py worker <queue folder> [solver names...]")
+        sys.exit(1)
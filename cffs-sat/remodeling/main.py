@@ -3,59 +3,371 @@ import sys
 import math
 import os
 import json
-import time
-import jsbeautifier
 import psutil
 import multiprocessing
 import timeit
-from multiprocessing import Pool, Lock, Value, Array
+import threading
+import mmap
+import tempfile
+import gzip
+import hashlib
+import shutil
+import errno
+from array import array
+from multiprocessing import Lock, Value, Array
+from multiprocessing.connection import wait
+try:
+    import resource
+except ImportError:  # not available on Windows: workers run without a memory cap
+    resource = None
 from pysat.solvers import *
+from pysat.card import CardEnc, EncType
+from store import ResultStore
+from bounds import max_columns
 
+# Part of every encoding cache key: bump it whenever a CreateClauses* method (or
+# the clause buffer format) changes, so cached formulas are never reused stale.
+ENCODING_VERSION = 1
 
-def is_subset(block1, block2):
-    block2_set = set(block2)
-    for elem in block1:
-        if elem not in block2_set:
-            return False
-    return True
 
-
-def union(blocks):
-    union_set = set()
+def column_masks(blocks):
+    """
+    Blocks (lists of 1-based rows) as integer bitmasks over the rows.
+    """
+    masks = []
     for block in blocks:
-        union_set.update(block)
-    return list(union_set)
+        mask = 0
+        for row in block:
+            mask |= 1 << (row - 1)
+        masks.append(mask)
+    return masks
+
+
+def _find_cover(masks, uncovered, d, row_columns, column):
+    # Some chosen column must contain the lowest uncovered row, so only those are
+    # tried: the search depth is at most d and the branching is the row weight.
+    if uncovered == 0:
+        return []
+    if d == 0:
+        return None
+    row = (uncovered & -uncovered).bit_length() - 1
+    for other in row_columns.get(row, ()):
+        if other != column:
+            cover = _find_cover(masks, uncovered & ~masks[other], d - 1, row_columns, column)
+            if cover is not None:
+                return [other] + cover
+    return None
+
+
+def cover_violations(blocks, d, limit=None):
+    """
+    Columns covered by the union of d other columns, as (column, covering columns)
+    pairs with 0-based column indices; at most limit of them when given.
+    Instead of the C(n-1, d) subsets per column, covers are searched row by row,
+    which exits early and stays fast for the n and d of the sweeps.
+    """
+    n = len(blocks)
+    if n - 1 < d:
+        return []
+    masks = column_masks(blocks)
+    row_columns = {}
+    for column, mask in enumerate(masks):
+        row = 0
+        while mask >> row:
+            if (mask >> row) & 1:
+                row_columns.setdefault(row, []).append(column)
+            row += 1
+
+    violations = []
+    for column in range(n):
+        cover = _find_cover(masks, masks[column], d, row_columns, column)
+        if cover is not None:
+            # Pad to exactly d columns; a superset still covers.
+            for other in range(n):
+                if len(cover) == d:
+                    break
+                if other != column and other not in cover:
+                    cover.append(other)
+            violations.append((column, tuple(sorted(cover))))
+            if limit is not None and len(violations) >= limit:
+                break
+    return violations
 
 
 def is_cff(blocks, d):
+    return len(cover_violations(blocks, d, limit=1)) == 0
+
+
+def is_cyclic_cff(blocks, d):
+    """
+    The property CreateClausesCyclicConstruction encodes: no column is covered by
+    the other columns of, or by, a window of d cyclically consecutive columns.
+    """
     n = len(blocks)
+    masks = column_masks(blocks)
     for i in range(n):
-        for j in range(1 << n):
-            selected_blocks = []
-            for k in range(n):
-                if (j & (1 << k)) != 0 and k != i:
-                    selected_blocks.append(blocks[k])
-            if len(selected_blocks) == d:
-                if is_subset(blocks[i], union(selected_blocks)):
-                    return False
+        window = [(i + j) % n for j in range(d)]
+        for column in range(n):
+            covering = window[:]
+            if column in covering:
+                covering.remove(column)
+            union = 0
+            for other in covering:
+                union |= masks[other]
+            if masks[column] & ~union == 0:
+                return False
     return True
 
 
+def _chunked(iterable, size):
+    """
+    Group a clause stream into lists of at most `size` clauses, so that
+    append_formula can be fed without materialising the whole formula.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _solver_from_spec(spec):
+    # The CFFSATSolver of the instance described by `spec` (see EncodingSpec).
+    cff = CFFSATSolver(spec['k'], spec['d'], spec['t'], spec['n'])
+    cff.cardinalityEncoding = spec.get('cardinality')
+    cff.symmetryBreaking = spec.get('symmetry')
+    cff.circulant = spec.get('circulant', False)
+    cff.methodName = spec['method']
+    return cff
+
+
+def _stream_clauses(spec):
+    """
+    Rebuild the clause generator described by `spec` (see EncodingSpec).
+    Used by the solver workers, so only the small spec is pickled, never the formula.
+    """
+    return getattr(_solver_from_spec(spec), spec['method'])()
+
+
+def _write_clause_buffer(clauses, path):
+    """
+    Store a clause stream as a flat, zero-terminated int32 literal buffer
+    (DIMACS-style, 4 bytes per literal). Returns the number of clauses.
+    """
+    nclauses = 0
+    with open(path, 'wb') as f:
+        for chunk in _chunked(clauses, 4096):
+            buffer = array('i')
+            for clause in chunk:
+                buffer.extend(clause)
+                buffer.append(0)
+            buffer.tofile(f)
+            nclauses += len(chunk)
+    return nclauses
+
+
+def _read_clause_buffer(path):
+    """
+    Clauses of a buffer written by _write_clause_buffer, read from a read-only
+    mmap so that every worker shares the same pages.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lits = memoryview(mm).cast('i')
+            try:
+                clause = []
+                for start in range(0, len(lits), 1 << 16):
+                    for lit in lits[start:start + (1 << 16)].tolist():
+                        if lit == 0:
+                            yield clause
+                            clause = []
+                        else:
+                            clause.append(lit)
+            finally:
+                lits.release()
+
+
+def _store_cached_encoding(buffer_path, cache_path):
+    """
+    Compress a clause buffer into the encoding cache (atomically, so concurrent
+    sweeps never see a partial file).
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(buffer_path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=1) as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    os.replace(tmp_path, cache_path)
+
+
+def _evict_cached_encodings(folder, limit):
+    """
+    Delete the least recently used encodings of the cache folder until the rest
+    take at most `limit` bytes.
+    """
+    entries = []
+    for name in os.listdir(folder):
+        if name.endswith('.clauses.gz'):
+            try:
+                stat = os.stat(os.path.join(folder, name))
+            except FileNotFoundError:
+                continue  # evicted by a concurrent sweep
+            entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.unlink(os.path.join(folder, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def _load_cached_encoding(cache_path, buffer_path):
+    """
+    Decompress a cached encoding into a clause buffer, marking it as recently
+    used. Returns the number of clauses.
+    """
+    os.utime(cache_path)
+    nclauses = 0
+    with gzip.open(cache_path, 'rb') as src, open(buffer_path, 'wb') as dst:
+        while True:
+            data = src.read(1 << 20)
+            if not data:
+                break
+            dst.write(data)
+            nclauses += array('i', data).count(0)
+    return nclauses
+
+
+def _run_solver_pipe(name, source, conn, memory_limit=None, phases=None):
+    # One portfolio member in its own process; the result goes back on its own pipe.
+    # Under memory_limit (bytes of address space) running out of memory fails this
+    # solver alone, instead of dragging the whole box into the OOM killer.
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    conn.send(_run_solver_task((name, source, phases)))
+    conn.close()
+
+
+def _clause_buffer_path():
+    # Prefer a RAM-backed filesystem so the buffer really is shared memory.
+    folder = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    fd, path = tempfile.mkstemp(prefix='cffsat-', suffix='.clauses', dir=folder)
+    os.close(fd)
+    return path
+
+
+def _receive_run(conn, p, memory_limit, start):
+    """
+    The answer of the solver process p on its pipe, as (name, sol, model or
+    error, clauses, seconds); p is joined and conn closed. A process that died
+    without answering is OUTOFMEMORY when it ran under a memory cap (the
+    allocator failing or the OOM killer), an error otherwise.
+    """
+    try:
+        answer = conn.recv()
+    except (EOFError, OSError):
+        p.join()
+        answer = (p.name, None, 'OUTOFMEMORY' if memory_limit and p.exitcode else 'ERROR:EOFError', None,
+                  timeit.default_timer() - start)
+    p.join()
+    conn.close()
+    return answer
+
+
+def _run_outcome(sol, model_or_error):
+    # Outcome of one solver run, as recorded in the solver_runs history.
+    if sol is True:
+        return 'SAT'
+    if sol is False:
+        return 'UNSAT'
+    if model_or_error == 'OUTOFMEMORY':
+        return 'OUTOFMEMORY'
+    return 'ERROR'
+
+
+def _load_solver(name, source, phases=None):
+    """
+    A solver `name` loaded with the clauses of `source` (the path of a clause
+    buffer, or an encoding spec to stream them from), its phases set when
+    given. Returns (solver, number of clauses).
+    """
+    solver = Solver(name=name)
+    nclauses = 0
+    if isinstance(source, str):
+        clauses = _read_clause_buffer(source)
+    else:
+        clauses = _stream_clauses(source)
+    for chunk in _chunked(clauses, 4096):
+        solver.append_formula(chunk)
+        nclauses += len(chunk)
+    if phases:
+        try:
+            solver.set_phases(phases)
+        except NotImplementedError:
+            pass
+    return solver, nclauses
+
+
 def _run_solver_task(args):
-    name, clauses = args
+    """
+    args is (solver name, source, phases): source is either the path of a clause
+    buffer or an encoding spec to stream the clauses from, and phases (or None)
+    are literals whose polarity the solver tries first. Returns (name, sol,
+    model or error, clauses, seconds spent in this worker).
+    """
+    name, source, phases = args
+    start = timeit.default_timer()
     try:
-        solver = Solver(name=name, bootstrap_with=clauses)
+        solver, nclauses = _load_solver(name, source, phases)
         sol = solver.solve()
         model = solver.get_model() if sol else None
         try:
             solver.delete()
         except Exception:
             pass
-        return (name, sol, model)
+        return (name, sol, model, nclauses, timeit.default_timer() - start)
     except MemoryError:
-        return (name, None, 'OUTOFMEMORY')
+        return (name, None, 'OUTOFMEMORY', None, timeit.default_timer() - start)
+    except OSError as e:
+        if e.errno == errno.ENOMEM:  # e.g. mapping the clause buffer under a memory cap
+            return (name, None, 'OUTOFMEMORY', None, timeit.default_timer() - start)
+        return (name, None, f'ERROR:{type(e).__name__}:{e}', None, timeit.default_timer() - start)
     except Exception as e:
-        return (name, None, f'ERROR:{type(e).__name__}:{e}')
+        return (name, None, f'ERROR:{type(e).__name__}:{e}', None, timeit.default_timer() - start)
+
+
+def _run_cube_worker(name, source, cubes, tasks, conn, memory_limit=None, phases=None):
+    # One cube-and-conquer worker: load the formula once, then solve the cubes
+    # whose indices it takes from `tasks` (None: no more) as assumptions, so what
+    # it learns on one cube helps on the next. Sends (index, sol, model or error,
+    # clauses, seconds) per cube on its pipe, and stops at the first SAT.
+    start = timeit.default_timer()
+    try:
+        if memory_limit and resource is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        solver, nclauses = _load_solver(name, source, phases)
+        while True:
+            index = tasks.get()
+            if index is None:
+                break
+            sol = solver.solve(assumptions=cubes[index])
+            conn.send((index, sol, solver.get_model() if sol else None, nclauses,
+                       timeit.default_timer() - start))
+            if sol:
+                break
+    except MemoryError:
+        conn.send((None, None, 'OUTOFMEMORY', None, timeit.default_timer() - start))
+    except OSError as e:
+        error = 'OUTOFMEMORY' if e.errno == errno.ENOMEM else f'ERROR:{type(e).__name__}:{e}'
+        conn.send((None, None, error, None, timeit.default_timer() - start))
+    except Exception as e:
+        conn.send((None, None, f'ERROR:{type(e).__name__}:{e}', None, timeit.default_timer() - start))
+    conn.close()
 
 
 class CFFSATSolver:
@@ -72,7 +384,88 @@ class CFFSATSolver:
             self.n = n
         self.outputFolder = 'cffdata'
         self.filename = 'cffdata0.json'
-        self.clauses = []
+        self.methodName = None
+        self.nclauses = None
+        self.nvars = None
+        # Row-weight encoding of CreateClausesWeightedK: None keeps the explicit
+        # (n - k)-combinations, otherwise a pysat.card.EncType name such as
+        # 'seqcounter', 'totalizer', 'sortnetwrk' or 'cardnetwrk'.
+        self.cardinalityEncoding = None
+        # (encoding, clauses, vars) of the row-weight bound a solve path encoded
+        # itself instead of cardinalityEncoding (incremental, lazy); recorded by
+        # the next UpdateJson in place of CardinalityCounts.
+        self.cardinalityUsed = None
+        # Symmetry breaking added to every CreateClauses* method: None, 'lex',
+        # 'doublelex' or 'weight' (see SymmetryBreakingClauses).
+        self.symmetryBreaking = None
+        # Keep generated encodings, compressed, under cffdata/.encodings so re-runs
+        # load them instead of generating them again (see PrepareClauseBuffer);
+        # beyond encodingCacheBytes the least recently used ones are deleted.
+        self.encodingCache = True
+        self.encodingCacheBytes = 2 * 2**30
+        # Incremental n-sweep: one in-process solver per (method, k, d, t) that
+        # only receives the clauses of each new column (see FindOneIncremental).
+        self.incremental = False
+        self.incSolver = None
+        self.incKey = None
+        # Row-activation search over t (see FindMinRows): the largest t tried,
+        # and the number of pre-allocated rows while such a search runs.
+        self.maxRows = 29
+        self.rowActivation = None
+        # Indexed results (see Store); the JSON files are exported from it.
+        self.store = None
+        # FindFrontier keeps doubling its step while probes take less than this
+        # fraction of the timeout, up to the growth of the frontier at the
+        # previous t (None: no cap).
+        self.frontierFastFraction = 0.1
+        self.frontierGrowth = None
+        # Order (and, when memory allows fewer solvers than the portfolio, trim)
+        # the portfolio from the recorded solver runs (see PortfolioOrder).
+        self.adaptivePortfolio = True
+        self.portfolioMinRuns = 10
+        # Solver workers run under an address-space cap (None: a share of the
+        # memory available at launch, see WorkerMemoryLimit; 0: no cap). While
+        # less than memoryReserve bytes are free, the largest worker is evicted;
+        # memory is sampled every memorySampleInterval seconds.
+        self.workerMemoryLimit = None
+        self.memoryReserve = 256 * 2**20
+        self.memorySampleInterval = 0.5
+        # Seed the solver phases from the last solution of this method, k and d
+        # (see WarmStartPhases); warmStarted marks the run in progress.
+        self.warmStart = False
+        self.lastModel = None
+        self.warmStarted = False
+        # Before a full solve, try to add one column to the stored solution of
+        # (t, n - 1) (see ExtendColumn), within extensionTimeout seconds; each
+        # instance is attempted at most once (extensionFailed).
+        self.columnExtension = True
+        self.extensionTimeout = 5.0
+        self.extensionAttempts = 0
+        self.extensionSuccesses = 0
+        self.extensionFailed = set()
+        self.extended = False
+        # Split instances into assumption cubes solved by a pool of workers
+        # instead of racing the portfolio on the whole formula (see FindOneCubes);
+        # cubeDepth cells are split on when the row symmetry cannot be used
+        # (None: enough for about 8 cubes per worker).
+        self.cubeAndConquer = False
+        self.cubeDepth = None
+        # Store the explicit CFF of the constructions module for each (method, k,
+        # d, t) the run reaches, before solving there (see SeedConstructions).
+        self.constructions = True
+        self.constructionsSeeded = set()
+        # Record instances past a proven upper bound on n as UNSAT without
+        # solving them (see RuledOutByBound).
+        self.bounds = True
+        # CreateClausesCyclicConstruction over circulant matrices only: the
+        # columns are rotations of a few generator columns (see Circulant).
+        self.circulant = False
+        # Counterexample-guided d-cover constraints, added lazily to one
+        # in-process solver (see FindOneLazy); at most lazyBatch covers per
+        # round (None: one per column).
+        self.lazy = False
+        self.lazyBatch = None
+        self.lazyStats = None
         self.timeout = 60
         self.timer = timeit.default_timer()
         self.lock = Lock()
@@ -84,10 +477,11 @@ class CFFSATSolver:
         self.outofmemorySingleSolver = False
         self.singleSolverName = 'glucose4'
         self.solverNames = self.defaultSolverNames
+        # Solver memory model used by EstimateSize (measured on glucose4 and maplechrono).
+        self.solverBaseBytes = 16 * 2**20
+        self.solverBytesPerLiteral = 48
 
     def CreateClausesDisjunctMatrices(self):
-        self.clauses = []
-
         # Create cff representation matrix.
         m = []
         x = 1
@@ -121,12 +515,10 @@ class CFFSATSolver:
                     for cursor in selected_columns:
                         if cursor == col_ind:
                             # w_m[row_ind][col_ind] => m[row_ind][cursor]
-                            self.clauses.append(
-                                [-w_m[row_ind][col_ind], m[row_ind][cursor]])
+                            yield [-w_m[row_ind][col_ind], m[row_ind][cursor]]
                         else:
                             # w_m[row_ind][col_ind] => -m[row_ind][cursor]
-                            self.clauses.append(
-                                [-w_m[row_ind][col_ind], -m[row_ind][cursor]])
+                            yield [-w_m[row_ind][col_ind], -m[row_ind][cursor]]
 
             # For each column in selected columns.
             for col_ind in selected_columns:
@@ -134,11 +526,62 @@ class CFFSATSolver:
                 # For each row.
                 for row_ind in range(self.t):
                     ws.append(w_m[row_ind][col_ind])
-                self.clauses.append(ws[:])
+                yield ws
 
-    def CreateClausesWeightedK(self):
-        self.clauses = []
+        self.nvars = w - 1
+        yield from self.SymmetryBreakingClauses(m)
+
+    def CreateClausesLogDisjunctMatrices(self):
+        """
+        CreateClausesDisjunctMatrices with log-encoded witnesses: the separating
+        row of each column of each (d+1)-subset is picked by ceil(log2 t)
+        selector bits instead of t one-hot w variables. Row r is the selector
+        value r (codes past t - 1 are excluded), and selecting it implies the
+        column has a one there and the rest of the subset zeros.
+        """
+        # Create cff representation matrix.
+        m = []
+        x = 1
+        for row in range(self.t):
+            v = []
+            for column in range(self.n):
+                v.append(x)
+                x += 1
+            m.append(v)
+
+        bits = (self.t - 1).bit_length()
+        last = self.t - 1
+
+        # Initialize selector variable.
+        s = x
+
+        # Get all combinations of columns, d + 1 by d + 1.
+        columns_combinations = itertools.combinations(range(self.n), self.d+1)
+
+        for selected_columns in columns_combinations:
+            for col_ind in selected_columns:
+                selector = list(range(s, s + bits))
+                s += bits
+
+                # selector == row_ind => m[row_ind][col_ind] and -m[row_ind][cursor]
+                for row_ind in range(self.t):
+                    differs = [-b if (row_ind >> j) & 1 else b for j, b in enumerate(selector)]
+                    for cursor in selected_columns:
+                        if cursor == col_ind:
+                            yield differs + [m[row_ind][cursor]]
+                        else:
+                            yield differs + [-m[row_ind][cursor]]
+
+                # selector <= t - 1: no one on a zero bit of t - 1 while the
+                # selector has ones on all of its higher one bits.
+                for j in range(bits):
+                    if not (last >> j) & 1:
+                        yield [-selector[j]] + [-selector[i] for i in range(j + 1, bits) if (last >> i) & 1]
 
+        self.nvars = s - 1
+        yield from self.SymmetryBreakingClauses(m)
+
+    def CreateClausesWeightedK(self):
         # Create cff representation matrix.
         m = []
         x = 1
@@ -172,12 +615,10 @@ class CFFSATSolver:
                     for cursor in selected_columns:
                         if cursor == col_ind:
                             # w_m[row_ind][col_ind] => m[row_ind][cursor]
-                            self.clauses.append(
-                                [-w_m[row_ind][col_ind], m[row_ind][cursor]])
+                            yield [-w_m[row_ind][col_ind], m[row_ind][cursor]]
                         else:
                             # w_m[row_ind][col_ind] => -m[row_ind][cursor]
-                            self.clauses.append(
-                                [-w_m[row_ind][col_ind], -m[row_ind][cursor]])
+                            yield [-w_m[row_ind][col_ind], -m[row_ind][cursor]]
 
             # For each column in selected columns.
             for col_ind in selected_columns:
@@ -185,7 +626,20 @@ class CFFSATSolver:
                 # For each row.
                 for row_ind in range(self.t):
                     ws.append(w_m[row_ind][col_ind])
-                self.clauses.append(ws[:])
+                yield ws
+
+        # Each row has at most k ones.
+        if self.cardinalityEncoding is not None:
+            top = w - 1
+            for row in range(self.t):
+                enc = CardEnc.atmost(lits=m[row], bound=self.k, top_id=top,
+                                     encoding=getattr(EncType, self.cardinalityEncoding))
+                top = max(top, enc.nv)
+                yield from enc.clauses
+
+            self.nvars = top
+            yield from self.SymmetryBreakingClauses(m)
+            return
 
         # Initialize z variable.
         z = w
@@ -197,13 +651,29 @@ class CFFSATSolver:
             for columns_posibility in columns_possibilities:
                 zs.append(z)
                 for column in columns_posibility:
-                    self.clauses.append([-z, -m[row][column]])
+                    yield [-z, -m[row][column]]
                 z += 1
-            self.clauses.append(zs[:])
+            yield zs
 
-    def CreateClausesCyclicConstruction(self):
-        self.clauses = []
+        self.nvars = z - 1
+        yield from self.SymmetryBreakingClauses(m)
 
+    def CardinalityCounts(self):
+        """
+        Clauses, auxiliary variables and literals spent on the row-weight bound of
+        CreateClausesWeightedK, for the selected cardinalityEncoding.
+        """
+        if self.cardinalityEncoding is None:
+            per_row = math.comb(self.n, self.n - self.k) if self.n >= self.k else 0
+            return (self.t * (per_row * (self.n - self.k) + 1), self.t * per_row,
+                    self.t * (2 * per_row * (self.n - self.k) + per_row))
+
+        enc = CardEnc.atmost(lits=list(range(1, self.n + 1)), bound=self.k, top_id=self.n,
+                             encoding=getattr(EncType, self.cardinalityEncoding))
+        return (self.t * len(enc.clauses), self.t * (max(enc.nv, self.n) - self.n),
+                self.t * sum(len(clause) for clause in enc.clauses))
+
+    def CreateClausesCyclicConstruction(self):
         # Create cff representation matrix.
         m = []
         x = 1
@@ -214,9 +684,19 @@ class CFFSATSolver:
                 x += 1
             m.append(v)
 
+        # Only the generator columns are free in circulant mode, and the windows
+        # that are rotations of each other give the same clauses.
+        windows = range(self.n)
+        if self.Circulant():
+            g = self.CirculantGenerators()
+            m = [[m[(row - column // g) % self.t][column % g] for column in range(self.n)]
+                 for row in range(self.t)]
+            if self.n == g * self.t:
+                windows = range(g)
+
         # Get all combinations of columns, d by d.
         columns_combinations = []
-        for i in range(self.n):
+        for i in windows:
             combination = []
             for j in range(self.d):
                 combination.append((i + j) % self.n)
@@ -236,13 +716,12 @@ class CFFSATSolver:
                 for row in range(self.t):
                     ys.append(y)
                     # If m[row][column] is false then it is covered.
-                    self.clauses.append([m[row][column], -y])
+                    yield [m[row][column], -y]
                     for coveringColumn in coveringColumns:
                         # If m[row][coveringColumn] is true then it is covered.
-                        self.clauses.append(
-                            [-m[row][coveringColumn], -y])
+                        yield [-m[row][coveringColumn], -y]
                     y += 1
-                self.clauses.append(ys)
+                yield ys
 
         # The d columns dont cover any column.
         for coveringColumns in columns_combinations:
@@ -255,26 +734,424 @@ class CFFSATSolver:
                 for row in range(self.t):
                     ys.append(y)
                     # If m[row][column] is false then it is covered.
-                    self.clauses.append([m[row][column], -y])
+                    yield [m[row][column], -y]
                     for coveringColumn in coveringColumns:
                         # If m[row][coveringColumn] is true then it is covered.
-                        self.clauses.append(
-                            [-m[row][coveringColumn], -y])
+                        yield [-m[row][coveringColumn], -y]
                     y += 1
-                self.clauses.append(ys)
+                yield ys
+
+        self.nvars = y - 1
+        yield from self.SymmetryBreakingClauses(m)
+
+    def SymmetryMode(self):
+        """
+        Symmetry-breaking mode actually applied to the current method. Column
+        permutations do not preserve the cyclic windows of
+        CreateClausesCyclicConstruction, so there only the rows are ordered,
+        and not at all in circulant mode, where rows are rotations of each other.
+        """
+        if self.symmetryBreaking is None or self.Circulant():
+            return None
+        if self.methodName == 'CreateClausesCyclicConstruction':
+            return 'rowlex'
+        return self.symmetryBreaking
+
+    def Circulant(self):
+        # Circulant mode applies to the cyclic construction, outside incremental
+        # sessions and row-activation searches (whose rows are not rotations).
+        return (self.circulant and self.methodName == 'CreateClausesCyclicConstruction'
+                and not self.incremental and self.rowActivation is None)
+
+    def CirculantGenerators(self):
+        """
+        Number of generator columns g in circulant mode. Column c is generator
+        c % g rotated down by c // g rows, so shifting the columns by g rotates
+        the rows by one; when n == g * t that maps window i onto window i + g,
+        and only the first g windows need clauses. The variables of the other
+        columns are not used (SolutionBlocks rebuilds them).
+        """
+        return math.ceil(self.n / self.t)
+
+    def _NewVar(self):
+        self.nvars += 1
+        return self.nvars
+
+    def _LexClauses(self, a, b):
+        """
+        a <= b lexicographically (false < true), for equally long lists of variables.
+        """
+        # e means a and b are equal on all the positions before i.
+        e = None
+        for i in range(len(a)):
+            guard = [] if e is None else [-e]
+            yield guard + [-a[i], b[i]]
+            if i < len(a) - 1:
+                e_next = self._NewVar()
+                yield guard + [a[i], b[i], e_next]
+                yield guard + [-a[i], -b[i], e_next]
+                e = e_next
+
+    def _UnaryCountClauses(self, lits):
+        """
+        Unary counter over lits; returns counts where counts[i] is true iff more
+        than i of the lits are true.
+        """
+        prev = [lits[0]]
+        for x in lits[1:]:
+            cur = []
+            for i in range(len(prev) + 1):
+                c = self._NewVar()
+                if i < len(prev):
+                    yield [-prev[i], c]
+                yield [-x, c] if i == 0 else [-x, -prev[i - 1], c]
+                yield [-c, x] + ([prev[i]] if i < len(prev) else [])
+                if i > 0:
+                    yield [-c] + ([prev[i]] if i < len(prev) else []) + [prev[i - 1]]
+                cur.append(c)
+            prev = cur
+        return prev
+
+    def SymmetryBreakingClauses(self, m):
+        """
+        Clauses ordering the incidence matrix m (rows of variables), with
+        auxiliaries numbered after self.nvars:
+        - 'lex': columns in lexicographic order.
+        - 'doublelex': rows and columns in lexicographic order.
+        - 'weight': columns by non-decreasing weight, rows in lexicographic order.
+        - 'rowlex': rows in lexicographic order.
+        """
+        mode = self.SymmetryMode()
+        if mode is None:
+            return
+
+        columns = [[m[row][column] for row in range(self.t)] for column in range(self.n)]
+        pairs = []
+        if mode in ('lex', 'doublelex'):
+            pairs += [(columns[j], columns[j + 1]) for j in range(self.n - 1)]
+        if mode in ('doublelex', 'weight', 'rowlex'):
+            pairs += [(m[i], m[i + 1]) for i in range(self.t - 1)]
+
+        for a, b in pairs:
+            yield from self._LexClauses(a, b)
+
+        if mode == 'weight':
+            counts = []
+            for column in columns:
+                count = yield from self._UnaryCountClauses(column)
+                counts.append(count)
+
+            for j in range(self.n - 1):
+                for i in range(self.t):
+                    yield [-counts[j][i], counts[j + 1][i]]
+
+    def _SeparatingClauses(self, m, column, coveringColumns):
+        """
+        Some row has a one in column and zeros in all the coveringColumns.
+        """
+        ys = []
+        for row in range(self.t):
+            y = self._NewVar()
+            ys.append(y)
+            yield [m[row][column], -y]
+            for coveringColumn in coveringColumns:
+                yield [-m[row][coveringColumn], -y]
+        return ys
+
+    def IncrementalReset(self, solver_name):
+        """
+        Start a fresh incremental session (solver and encoding state) for the
+        current method, k, d and t, with no columns yet.
+        """
+        if self.incSolver is not None:
+            self.incSolver.delete()
+        self.incSolver = Solver(name=solver_name)
+        self.incKey = (self.methodName, self.k, self.d, self.t, solver_name,
+                       self.symmetryBreaking)
+        self.incMatrix = [[] for _ in range(self.t)]
+        self.incCounters = [None] * self.t
+        self.incRowLex = [None] * max(0, self.t - 1)
+        self.incLastCount = None
+        self.incGuard = None
+        self.incClauses = 0
+        self.incCardinality = [0, 0]
+        self.nvars = 0
+
+    def IncrementalColumnClauses(self, c):
+        """
+        Clauses added to the incremental session when column c joins columns
+        0..c-1. Everything that only depends on those columns is permanent; the
+        cyclic windows that wrap around depend on n and are guarded by
+        self.incGuard, which is assumed true for this n only.
+
+        The row-weight bound of CreateClausesWeightedK is always a sequential
+        counter here, since it extends column by column.
+        """
+        m = self.incMatrix
+        for row in range(self.t):
+            m[row].append(self._NewVar())
+
+        if self.methodName == 'CreateClausesCyclicConstruction':
+            n = c + 1
+
+            # The new non-wrapping window ends at c and covers none of the earlier columns.
+            if c - self.d + 1 >= 0:
+                window = list(range(c - self.d + 1, c + 1))
+                for column in window:
+                    coveringColumns = window[:]
+                    coveringColumns.remove(column)
+                    yield (yield from self._SeparatingClauses(m, column, coveringColumns))
+                for column in range(c - self.d + 1):
+                    yield (yield from self._SeparatingClauses(m, column, window))
+
+            # The earlier non-wrapping windows do not cover the new column.
+            for i in range(c - self.d + 1):
+                yield (yield from self._SeparatingClauses(m, c, list(range(i, i + self.d))))
+
+            # Windows wrapping around only hold for this n.
+            self.incGuard = self._NewVar()
+            for i in range(max(0, c - self.d + 2), n):
+                window = [(i + j) % n for j in range(self.d)]
+                for column in window:
+                    coveringColumns = window[:]
+                    coveringColumns.remove(column)
+                    ys = yield from self._SeparatingClauses(m, column, coveringColumns)
+                    yield ys + [-self.incGuard]
+                for column in range(n):
+                    if column not in window:
+                        ys = yield from self._SeparatingClauses(m, column, window)
+                        yield ys + [-self.incGuard]
+        else:
+            # Every d + 1 columns including c, as in CreateClausesDisjunctMatrices.
+            for others in itertools.combinations(range(c), self.d):
+                selected_columns = others + (c,)
+                for column in selected_columns:
+                    coveringColumns = [i for i in selected_columns if i != column]
+                    yield (yield from self._SeparatingClauses(m, column, coveringColumns))
+
+        if self.methodName == 'CreateClausesWeightedK':
+            # Sequential counter: s[j] means more than j ones in the row so far.
+            top = self.nvars
+            counter = []
+            for row in range(self.t):
+                x = m[row][c]
+                if self.k == 0:
+                    counter.append([-x])
+                    continue
+                prev = self.incCounters[row]
+                s = [self._NewVar() for _ in range(self.k)]
+                counter.append([-x, s[0]])
+                if prev is None:
+                    for j in range(1, self.k):
+                        counter.append([-s[j]])
+                else:
+                    counter.append([-prev[0], s[0]])
+                    for j in range(1, self.k):
+                        counter.append([-x, -prev[j - 1], s[j]])
+                        counter.append([-prev[j], s[j]])
+                    counter.append([-x, -prev[self.k - 1]])
+                self.incCounters[row] = s
+            self.incCardinality[0] += len(counter)
+            self.incCardinality[1] += self.nvars - top
+            yield from counter
+
+        mode = self.SymmetryMode()
+        if mode in ('lex', 'doublelex') and c > 0:
+            yield from self._LexClauses([m[row][c - 1] for row in range(self.t)],
+                                        [m[row][c] for row in range(self.t)])
+        if mode in ('doublelex', 'weight', 'rowlex'):
+            # Extend the lexicographic comparison of each pair of rows by column c.
+            for i in range(self.t - 1):
+                a, b = m[i], m[i + 1]
+                e = self.incRowLex[i]
+                if c > 0:
+                    guard = [] if e is None else [-e]
+                    e = self._NewVar()
+                    yield guard + [a[c - 1], b[c - 1], e]
+                    yield guard + [-a[c - 1], -b[c - 1], e]
+                    self.incRowLex[i] = e
+                yield ([] if e is None else [-e]) + [-a[c], b[c]]
+        if mode == 'weight':
+            count = yield from self._UnaryCountClauses([m[row][c] for row in range(self.t)])
+            if self.incLastCount is not None:
+                for i in range(self.t):
+                    yield [-self.incLastCount[i], count[i]]
+            self.incLastCount = count
+
+    def IncrementalAddColumn(self):
+        """
+        Add the next column to the incremental session, retiring the clauses that
+        were only valid for the previous n.
+        """
+        if self.incGuard is not None:
+            self.incSolver.add_clause([-self.incGuard])
+            self.incClauses += 1
+            self.incGuard = None
+        c = len(self.incMatrix[0])
+        for chunk in _chunked(self.IncrementalColumnClauses(c), 4096):
+            self.incSolver.append_formula(chunk)
+            self.incClauses += len(chunk)
+
+    def EncodingSpec(self):
+        """
+        Small picklable description of the current instance; workers rebuild the
+        clause stream from it with _stream_clauses instead of receiving the formula.
+        It is also the encoding cache key, so it only holds what changes the
+        formula: the cardinality encoding only for CreateClausesWeightedK.
+        """
+        spec = {'method': self.methodName, 'k': self.k, 'd': self.d, 't': self.t, 'n': self.n,
+                'symmetry': self.symmetryBreaking}
+        if self.methodName == 'CreateClausesWeightedK':
+            spec['cardinality'] = self.cardinalityEncoding
+        if self.Circulant():
+            spec['circulant'] = True
+        return spec
+
+    def EstimateSize(self):
+        """
+        Closed-form size of the current CreateClauses* encoding (with its
+        cardinality and symmetry options) and the memory it needs:
+        - vars, clauses, literals: exact counts.
+        - buffer_bytes: the shared clause buffer (4 bytes per literal and terminator).
+        - solver_bytes: approximate RSS of one solver holding the formula.
+        """
+        k, d, t, n = self.k, self.d, self.t, self.n
+        nvars = t * n
+        nclauses = 0
+        nliterals = 0
+
+        if self.methodName == 'CreateClausesCyclicConstruction':
+            # n windows (g in circulant mode when n == g*t); each window column
+            # vs the rest of the window, and the window vs every column outside it.
+            windows = n
+            if self.Circulant() and n == self.CirculantGenerators() * t:
+                windows = self.CirculantGenerators()
+            inside = windows * d
+            outside = windows * (n - min(d, n))
+            nvars += (inside + outside) * t
+            nclauses += inside * (t * d + 1) + outside * (t * (d + 1) + 1)
+            nliterals += inside * (2 * t * d + t) + outside * (2 * t * (d + 1) + t)
+        elif self.methodName == 'CreateClausesLogDisjunctMatrices':
+            # d + 1 witnesses per subset, each with ceil(log2 t) selector bits,
+            # t * (d + 1) implications and the clauses bounding the selector.
+            witnesses = math.comb(n, d + 1) * (d + 1)
+            bits = (t - 1).bit_length()
+            last = t - 1
+            bound = [1 + bin(last >> (j + 1)).count('1') for j in range(bits) if not (last >> j) & 1]
+            nvars += witnesses * bits
+            nclauses += witnesses * (t * (d + 1) + len(bound))
+            nliterals += witnesses * (t * (d + 1) * (bits + 1) + sum(bound))
+        else:
+            subsets = math.comb(n, d + 1)
+            nvars += subsets * t * (d + 1)
+            nclauses += subsets * ((d + 1) ** 2 * t + d + 1)
+            nliterals += subsets * (2 * (d + 1) ** 2 * t + (d + 1) * t)
+            if self.methodName == 'CreateClausesWeightedK':
+                card_clauses, card_vars, card_literals = self.CardinalityCounts()
+                nvars += card_vars
+                nclauses += card_clauses
+                nliterals += card_literals
+
+        mode = self.SymmetryMode()
+        lex = []
+        if mode in ('lex', 'doublelex'):
+            lex += [t] * (n - 1)
+        if mode in ('doublelex', 'weight', 'rowlex'):
+            lex += [n] * (t - 1)
+        for length in lex:
+            nvars += length - 1
+            nclauses += 3 * length - 2
+            nliterals += 11 * (length - 1) if length > 1 else 2
+        if mode == 'weight':
+            nvars += n * (t - 1) * (t + 2) // 2
+            nclauses += n * 2 * (t - 1) * (t + 1) + (n - 1) * t
+            nliterals += n * (11 * t * (t - 1) // 2 + 3 * (t - 1)) + 2 * (n - 1) * t
+
+        return {
+            'vars': nvars,
+            'clauses': nclauses,
+            'literals': nliterals,
+            'buffer_bytes': 4 * (nliterals + nclauses),
+            'solver_bytes': self.solverBaseBytes + self.solverBytesPerLiteral * nliterals,
+        }
+
+    def SolversThatFit(self):
+        """
+        How many solvers holding the current encoding fit in the available memory,
+        next to the shared clause buffer (0: the instance should not be attempted).
+        """
+        estimate = self.EstimateSize()
+        room = psutil.virtual_memory().available - estimate['buffer_bytes']
+        return max(0, int(room // estimate['solver_bytes']))
+
+    def EncodingCachePath(self):
+        """
+        Location of the current encoding in the on-disk cache, addressed by a hash
+        of its EncodingSpec and ENCODING_VERSION: cffdata/.encodings/<sha256>.clauses.gz
+        """
+        key = json.dumps(dict(self.EncodingSpec(), version=ENCODING_VERSION), sort_keys=True)
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.outputFolder, '.encodings', digest + '.clauses.gz')
+
+    def PrepareClauseBuffer(self, create_clauses_fn):
+        """
+        Write the current encoding into a fresh clause buffer and return its path.
+        With self.encodingCache the buffer is loaded from the cache when present,
+        and stored there after generation otherwise (evicting the least recently
+        used encodings beyond encodingCacheBytes).
+        """
+        buffer_path = _clause_buffer_path()
+        cache_path = self.EncodingCachePath() if self.encodingCache else None
+        try:
+            try:
+                self.nclauses = _load_cached_encoding(cache_path, buffer_path) if cache_path else None
+            except FileNotFoundError:
+                self.nclauses = None  # not cached, or evicted meanwhile
+            if self.nclauses is None:
+                self.nclauses = _write_clause_buffer(create_clauses_fn(), buffer_path)
+                if cache_path is not None:
+                    _store_cached_encoding(buffer_path, cache_path)
+                    _evict_cached_encodings(os.path.dirname(cache_path), self.encodingCacheBytes)
+        except BaseException:
+            os.unlink(buffer_path)
+            raise
+        return buffer_path
+
+    def ClauseCount(self):
+        """
+        Number of clauses of the current instance. Known once the encoding has been
+        written to a clause buffer or reported by a solver worker; otherwise (e.g. a
+        single-solver TIMEOUT) it comes from the closed form in EstimateSize.
+        """
+        if self.nclauses is None:
+            self.nclauses = self.EstimateSize()['clauses']
+        return self.nclauses
+
+    def SolutionBlocks(self):
+        """
+        The model in self.solution as blocks (the 1-based rows of each column).
+        In circulant mode the columns past the generators are rebuilt as their
+        rotations.
+        """
+        blocks = [[] for _ in range(self.n)]
+
+        for x in self.solution[0:self.n*self.t]:
+            if x > 0:
+                blocks[(x-1) % self.n].append(((x-1) // self.n) + 1)
+
+        if self.Circulant():
+            g = self.CirculantGenerators()
+            blocks = [sorted((row - 1 + column // g) % self.t + 1 for row in blocks[column % g])
+                      for column in range(self.n)]
+        return blocks
 
     def PrintSolution(self):
         print("k:", self.k, 'd:', self.d, 't:', self.t, 'n:', self.n, 
-              'len(clauses):', len(self.clauses), "time:", self.time)
+              'len(clauses):', self.ClauseCount(), "time:", self.time)
 
         if self.solutionExists.value == 1.0:
-            blocks = [[] for _ in range(self.n)]
+            blocks = self.SolutionBlocks()
 
-            for x in self.solution[0:self.n*self.t]:
-                if x > 0:
-                    blocks[(x-1) % self.n].append(((x-1) // self.n) + 1)
-
-            # print("Is cff:", is_cff(blocks, self.d))
             # blocks = sorted(blocks, key=lambda x: sum(x))
             print('blocks:')
             for block in blocks:
@@ -297,68 +1174,150 @@ class CFFSATSolver:
         Dynamically set filename based on the clause creation method and parameters.
         Example: cffdata/CreateClausesMehtodName/data_k_0_d_2.json
         """
+        self.methodName = method_name
         folder = os.path.join(self.outputFolder, method_name)
         os.makedirs(folder, exist_ok=True)
         self.filename = os.path.join(folder, f"data_k_{self.k}_d_{self.d}.json")
 
+    def VerifySolution(self, blocks):
+        """
+        Check a model decoded into blocks against the property its method encodes
+        (and the row-weight bound of CreateClausesWeightedK).
+        """
+        if self.methodName == 'CreateClausesCyclicConstruction':
+            return is_cyclic_cff(blocks, self.d)
+        if self.methodName == 'CreateClausesWeightedK':
+            weights = {}
+            for block in blocks:
+                for row in block:
+                    weights[row] = weights.get(row, 0) + 1
+            if any(weight > self.k for weight in weights.values()):
+                return False
+        return is_cff(blocks, self.d)
+
     def UpdateJson(self):
         blocks = []
         if self.solutionExists.value == 1.0:
-            blocks = [[] for _ in range(self.n)]
-
-            for x in self.solution[0:self.n*self.t]:
-                if x > 0:
-                    blocks[(x-1) % self.n].append(((x-1) // self.n) + 1)
+            blocks = self.SolutionBlocks()
 
             # blocks = sorted(blocks, key=lambda x: sum(x))
 
-        try:
-            with open(self.filename, 'r') as jsonFile:
-                data = json.load(jsonFile)
-        except FileNotFoundError:
-            data = []
-
-        objInData = [obj for obj in data if obj['d'] ==
-                     self.d and obj['t'] == self.t and obj['n'] == self.n and obj['k'] == self.k]
-
-        if len(objInData) == 0:
-            newdata = {
-                'k': self.k,
-                'd': self.d,
-                't': self.t,
-                'n': self.n,
-                'clauses': len(self.clauses),
-                'time': self.time,    
+            # Never persist a model that is not what the method encodes.
+            if not self.VerifySolution(blocks):
+                print('Model failed verification, recording ERROR')
+                self.solutionExists.value = -5.0
+                blocks = []
+            else:
+                self.lastModel = (self.methodName, self.k, self.d, self.t, self.n, blocks)
+
+        newdata = {
+            'k': self.k,
+            'd': self.d,
+            't': self.t,
+            'n': self.n,
+            'clauses': self.ClauseCount(),
+            'time': self.time,    
+            'symmetry': self.SymmetryMode() or 'none',
+        }
+
+        if self.incremental:
+            newdata['incremental'] = True
+        if self.warmStarted:
+            newdata['warmstart'] = True
+        self.warmStarted = False
+        if self.Circulant():
+            newdata['circulant'] = True
+        if self.lazyStats is not None:
+            newdata['lazy'] = self.lazyStats
+        self.lazyStats = None
+        if self.extended:
+            newdata['extension'] = True
+        self.extended = False
+        if self.rowActivation is not None:
+            newdata['rowActivation'] = self.rowActivation
+
+        if self.methodName == 'CreateClausesWeightedK':
+            if self.cardinalityUsed is not None:
+                encoding, card_clauses, card_vars = self.cardinalityUsed
+            else:
+                encoding = self.cardinalityEncoding or 'combinations'
+                card_clauses, card_vars, _ = self.CardinalityCounts()
+            newdata['cardinality'] = {
+                'encoding': encoding,
+                'clauses': card_clauses,
+                'vars': card_vars,
             }
+        self.cardinalityUsed = None
 
-            if self.solutionExists.value == 1.0:
-                newdata['solution'] = blocks
-            elif self.solutionExists.value == -1.0:
-                newdata['solution'] = 'UNSAT'
-            elif self.solutionExists.value == -2.0:
-                newdata['solution'] = 'UNKNOWN'
-            elif self.solutionExists.value == -3.0:
-                newdata['solution'] = 'TIMEOUT'
-            elif self.solutionExists.value == -4.0:
-                newdata['solution'] = 'OUTOFMEMORY'
-            else:
-                newdata['solution'] = 'ERROR'
-            data.append(newdata)
-        elif self.solutionExists.value == 1.0:
-            sol = objInData[0]['solution']
-            if sol != 'UNSAT':
-                objInData[0]['solution'] = blocks
+        if self.solutionExists.value == 1.0:
+            newdata['solution'] = blocks
         elif self.solutionExists.value == -1.0:
-            sol = objInData[0]['solution']
-            if sol != 'UNSAT':
-                objInData[0]['solution'] = 'UNSAT'
+            # Without a circulant solution there may still be another cyclic one.
+            newdata['solution'] = 'UNKNOWN' if self.Circulant() else 'UNSAT'
+        elif self.solutionExists.value == -2.0:
+            newdata['solution'] = 'UNKNOWN'
+        elif self.solutionExists.value == -3.0:
+            newdata['solution'] = 'TIMEOUT'
+        elif self.solutionExists.value == -4.0:
+            newdata['solution'] = 'OUTOFMEMORY'
+        else:
+            newdata['solution'] = 'ERROR'
 
-        data = sorted(data, key=lambda x: (x['k'], x['d'], x['t'], -x['n']))
+        # One indexed transaction instead of rewriting the whole JSON file; an
+        # existing instance is only overwritten by a new SAT or UNSAT, never
+        # over an UNSAT (see ResultStore.put).
+        self.Store().put(self.methodName, newdata)
 
-        with open(self.filename, 'w') as jsonFile:
-            opts = jsbeautifier.default_options()
-            opts.indent_size = 2
-            jsonFile.write(jsbeautifier.beautify(json.dumps(data), opts))
+    def Store(self):
+        """
+        The result store of outputFolder, importing the JSON file of the current
+        method, k and d the first time it is used.
+        """
+        path = os.path.join(self.outputFolder, 'results.sqlite')
+        if self.store is None or self.store.path != path:
+            self.store = ResultStore(path)
+        self.store.import_json(self.methodName, self.filename)
+        return self.store
+
+    def ExportJson(self):
+        """
+        Write the data_k_*_d_*.json files (and their .overleaf tables) of the
+        current method from the result store.
+        """
+        if self.methodName is not None:
+            self.Store().export_all(self.outputFolder, self.methodName)
+
+    def PortfolioOrder(self, names, width=None):
+        """
+        The solvers of `names` in launch order for the current instance: best
+        solved ratio first, then lowest PAR-2 time, over the recorded runs of
+        this method and d on instances of similar size (t*n within a factor of
+        2; all sizes when that region has fewer than portfolioMinRuns runs).
+        Solvers without history come last, in their original order. With a
+        width smaller than the portfolio, only the first `width` are kept once
+        there are portfolioMinRuns runs on record and some of them solved.
+        """
+        if not self.adaptivePortfolio:
+            return list(names)
+        store = self.Store()
+        cells = self.t * self.n
+        stats = store.solver_stats(self.methodName, self.d, cells // 2, cells * 2)
+        if sum(stat['runs'] for stat in stats.values()) < self.portfolioMinRuns:
+            stats = store.solver_stats(self.methodName, self.d)
+
+        ranked = sorted((name for name in names if name in stats),
+                        key=lambda name: (-stats[name]['solved'] / stats[name]['runs'], stats[name]['score']))
+        order = ranked + [name for name in names if name not in stats]
+        if (width is not None and width < len(order)
+                and sum(stat['runs'] for stat in stats.values()) >= self.portfolioMinRuns
+                and any(stats[name]['solved'] for name in ranked)):
+            order = order[:width]
+        return order
+
+    def RecordSolverRuns(self, runs):
+        # runs: (solver, outcome, seconds) of the current instance.
+        if runs:
+            self.Store().add_solver_runs(self.methodName, self.k, self.d, self.t, self.n, runs)
 
     def TerminateProcesses(self):
         self.lock.acquire()
@@ -368,22 +1327,61 @@ class CFFSATSolver:
         finally:
             self.lock.release()
 
+    def SeedConstructions(self):
+        """
+        On demand, once per method, k, d and t: store the best explicit CFF of
+        the constructions module with t rows when it has more columns than any
+        stored solution with at most t rows. It is checked with VerifySolution
+        and recorded with its provenance; InferSolution then answers every n up
+        to it and NextInstance jumps past it, so the sweep only pays SAT time
+        above the constructed bound. Only the t being looked up is built (the
+        module memoises the smaller ones it combines), so a run starting at any
+        t seeds exactly the rows it reaches. Not for the cyclic construction,
+        whose solutions must be cyclic.
+        """
+        key = (self.methodName, self.k, self.d, self.t)
+        if not self.constructions or not self.MonotoneInN() or self.t > self.maxRows or key in self.constructionsSeeded:
+            return
+        self.constructionsSeeded.add(key)
+        from constructions import best  # imports this module
+
+        store = self.Store()
+        provenance, blocks = best(self.d, self.t, self.k if self.methodName == 'CreateClausesWeightedK' else None)
+        if len(blocks) <= store.max_sat_n(self.methodName, self.k, self.d, self.t):
+            return
+        if not self.VerifySolution(blocks):
+            print('Construction for t:', self.t, 'failed verification, skipped')
+            return
+        store.put(self.methodName, {
+            'k': self.k,
+            'd': self.d,
+            't': self.t,
+            'n': len(blocks),
+            'clauses': 0,
+            'time': 0.0,
+            'construction': provenance,
+            'solution': blocks,
+        })
+        print('Construction stored for t:', self.t, 'n:', len(blocks))
+
     def SolutionCached(self):
-        try:
-            with open(self.filename, 'r') as jsonFile:
-                data = json.load(jsonFile)
-        except FileNotFoundError:
-            data = []
-        objInData = [obj for obj in data if obj['d'] == self.d and obj['t'] == self.t and obj['n'] == self.n and obj['k'] == self.k]
+        self.SeedConstructions()
+        obj = self.Store().get(self.methodName, self.k, self.d, self.t, self.n)
+        objInData = [] if obj is None else [obj]
 
         if len(objInData) != 0 and isinstance(objInData[0]['solution'], list) and len(objInData[0]['solution']) != 0:
             print('Solution already in json\n')
             self.solutionExists.value = 1.0
+            self.lastModel = (self.methodName, self.k, self.d, self.t, self.n, objInData[0]['solution'])
             return True
         elif len(objInData) != 0 and objInData[0]['solution'] == 'UNSAT':
             print('Solution already in json\n')
             self.solutionExists.value = -1.0
             return True
+        elif self.InferSolution():
+            return True
+        elif self.RuledOutByBound():
+            return True
         elif len(objInData) != 0 and (objInData[0]['solution'] == 'TIMEOUT' or objInData[0]['solution'] == 'OUTOFMEMORY'):
             if objInData[0]['time'] < self.timeout:
                 self.solutionExists.value = -3.0 if objInData[0]['solution'] == 'TIMEOUT' else -4.0
@@ -395,159 +1393,542 @@ class CFFSATSolver:
         else:
             return False
 
-    def SwitchToSingleSolver(self, create_clauses_fn):
+    def MonotoneInN(self):
+        # Dropping a column keeps a solution, except for the cyclic construction,
+        # whose windows depend on n. Adding an empty row always keeps it.
+        return self.methodName != 'CreateClausesCyclicConstruction'
+
+    def InferSolution(self):
+        """
+        Answer the current instance from a stored one that dominates it, and store
+        it as derived from that instance. A solution with t' <= t rows and n' >= n
+        columns gives one for (t, n) (its first n columns); an UNSAT with t' >= t
+        and n' <= n makes (t, n) UNSAT. For the cyclic construction n' == n.
+        """
+        store = self.Store()
+        same_n = not self.MonotoneInN()
+        witness = store.sat_witness(self.methodName, self.k, self.d, self.t, self.n, same_n)
+        if witness is not None and self.VerifySolution(witness['solution'][:self.n]):
+            solution = witness['solution'][:self.n]
+            self.solutionExists.value = 1.0
+            self.lastModel = (self.methodName, self.k, self.d, self.t, self.n, solution)
+        else:
+            witness = store.unsat_witness(self.methodName, self.k, self.d, self.t, self.n, same_n)
+            if witness is None:
+                return False
+            solution = 'UNSAT'
+            self.solutionExists.value = -1.0
+
+        store.put(self.methodName, {
+            'k': self.k,
+            'd': self.d,
+            't': self.t,
+            'n': self.n,
+            'clauses': 0,
+            'time': 0.0,
+            'derived': {'t': witness['t'], 'n': witness['n']},
+            'solution': solution,
+        })
+        print('Solution inferred from t:', witness['t'], 'n:', witness['n'], '\n')
+        return True
+
+    def RuledOutByBound(self):
+        """
+        Record the current instance as UNSAT when n exceeds the smallest upper bound
+        of the bounds module for d, t (and k, for CreateClausesWeightedK), with
+        the bound that rules it out. Only for n > d, where the bounds hold, and
+        not for the cyclic construction, which asks less than a d-CFF.
+        """
+        if not self.bounds or not self.MonotoneInN() or self.n <= self.d:
+            return False
+        bound, name = max_columns(self.d, self.t, self.k if self.methodName == 'CreateClausesWeightedK' else None)
+        if self.n <= bound:
+            return False
+
+        self.solutionExists.value = -1.0
+        self.Store().put(self.methodName, {
+            'k': self.k,
+            'd': self.d,
+            't': self.t,
+            'n': self.n,
+            'clauses': 0,
+            'time': 0.0,
+            'bound': {'name': name, 'n': bound},
+            'solution': 'UNSAT',
+        })
+        print('UNSAT by the', name, 'bound: n <=', bound, '\n')
+        return True
+
+    def NextInstance(self):
         """
-        Keep behavior: switch to the single solver name (self.singleSolverName).
-        This implementation simply sets solverNames and will run FindOneNoMemReset
-        with concurrency reduced to 1 in a subsequent step.
+        Step the (t, n) sweep: the next n after a solution, otherwise the next t
+        starting again from n = t. When a stored solution with at most t rows
+        already has more columns, jump straight to it; it is then answered by
+        InferSolution and the sweep carries on from the first n not yet known.
         """
-        self.outofmemory = True
-        self.solverNames = [self.singleSolverName]
-        # No process list to terminate now (we use pool approach); prepare to run single-solver next
-        # recreate clauses so the single-solver run uses a fresh set
-        create_clauses_fn()
+        if self.solutionExists.value == 1.0:
+            self.n += 1
+        else:
+            self.t += 1
+            self.n = self.t
+        if self.MonotoneInN():
+            self.SeedConstructions()
+            self.n = max(self.n, self.Store().max_sat_n(self.methodName, self.k, self.d, self.t))
+
+    def RefuseOutOfMemory(self):
+        """
+        Record OUTOFMEMORY for an instance that EstimateSize says cannot fit,
+        without generating it. The record keeps time 0, so a later run with more
+        free memory tries again.
+        """
+        estimate = self.EstimateSize()
+        print('Estimated', estimate['vars'], 'vars,', estimate['clauses'], 'clauses,',
+              estimate['buffer_bytes'] + estimate['solver_bytes'], 'bytes: does not fit in memory')
+        self.solutionExists.value = -4.0
+        self.time = 0.0
+        self.PrintSolution()
+        self.UpdateJson()
+        print()
+
+    def WarmStartPhases(self, var=None):
+        """
+        Phases for the current instance from the last solution of the same method,
+        k and d: each matrix variable the two instances share (same row and
+        column) starts with the value it had there, so extending a solution by a
+        column or a row is mostly a matter of filling in the new cells. var maps
+        (row, column) to its variable (default: row*n + column + 1). None when
+        there is nothing to start from.
+        """
+        if not self.warmStart or self.lastModel is None:
+            return None
+        method, k, d, t, n, blocks = self.lastModel
+        if (method, k, d) != (self.methodName, self.k, self.d) or (t, n) == (self.t, self.n):
+            return None
+        if var is None:
+            var = lambda row, column: row * self.n + column + 1
+
+        phases = []
+        for column in range(min(n, self.n)):
+            rows = set(blocks[column])
+            for row in range(min(t, self.t)):
+                phases.append(var(row, column) if row + 1 in rows else -var(row, column))
+        return phases
+
+    def ExtendColumn(self):
+        """
+        Column-extension fast path: keep the n - 1 columns of the stored solution
+        of (t', n - 1), t' <= t, and solve only for a new last column. Its t
+        variables (x_r: row r is in the new column) must avoid being covered by
+        any d old columns, and must not complete a cover of an old column
+        together with d - 1 others; for CreateClausesWeightedK, rows already of
+        weight k stay out of it. A few hundred clauses over t variables instead
+        of the full encoding. If the old columns admit no new one (which says
+        nothing about (t, n) itself), the caller falls back to the full solve.
+        Returns True when the instance was solved and recorded this way. A
+        failed instance is remembered and not attempted again.
+        """
+        key = (self.methodName, self.k, self.d, self.t, self.n)
+        if not self.columnExtension or not self.MonotoneInN() or self.n - 1 < self.d or key in self.extensionFailed:
+            return False
+        witness = self.Store().sat_witness(self.methodName, self.k, self.d, self.t, self.n - 1, True)
+        if witness is None:
+            return False
+
+        self.extensionAttempts += 1
+        start = timeit.default_timer()
+        blocks = [set(block) for block in witness['solution']]
+        rows = range(1, self.t + 1)
+        clauses = []
+        for covering in itertools.combinations(blocks, self.d):
+            union = set().union(*covering)
+            clauses.append([row for row in rows if row not in union])
+        for column, block in enumerate(blocks):
+            others = blocks[:column] + blocks[column + 1:]
+            for covering in itertools.combinations(others, self.d - 1):
+                clauses.append([-row for row in block - set().union(*covering)])
+        if self.methodName == 'CreateClausesWeightedK':
+            weights = [0] * (self.t + 1)
+            for block in blocks:
+                for row in block:
+                    weights[row] += 1
+            clauses += [[-row] for row in rows if weights[row] >= self.k]
+
+        column = None
+        if all(clauses):
+            with Solver(name=self.singleSolverName, bootstrap_with=clauses) as solver:
+                if self._SolveInterruptible(solver, [], self.extensionTimeout) is True:
+                    column = {lit for lit in solver.get_model() if lit > 0}
+
+        if column is not None:
+            self.extensionSuccesses += 1
+        print('Column extension from t:', witness['t'], 'n:', witness['n'],
+              'succeeded' if column is not None else 'failed',
+              f'({self.extensionSuccesses}/{self.extensionAttempts} extended)')
+        if column is None:
+            self.extensionFailed.add(key)
+            return False
+
+        self.solution = Array('i', [0] * (self.n * self.t))
+        for col, block in enumerate(blocks + [column]):
+            for row in range(self.t):
+                var = row * self.n + col + 1
+                self.solution[var - 1] = var if row + 1 in block else -var
+        self.solutionExists.value = 1.0
+        self.nclauses = None
+        self.extended = True
+        self.time = timeit.default_timer() - start
+        self.PrintSolution()
+        self.UpdateJson()
+        print()
+        return self.solutionExists.value == 1.0
+
+    def WorkerMemoryLimit(self, concurrency):
+        """
+        Address-space cap of one solver worker: what it inherits from this process
+        and maps of the clause buffer, plus an equal share of the memory available
+        beyond memoryReserve (at least the estimated footprint of one solver).
+        """
+        if self.workerMemoryLimit is not None:
+            return self.workerMemoryLimit or None
+        estimate = self.EstimateSize()
+        share = (psutil.virtual_memory().available - self.memoryReserve) // max(1, concurrency)
+        return (psutil.Process().memory_info().vms + estimate['buffer_bytes']
+                + max(share, estimate['solver_bytes']))
+
+    def EvictLargestWorker(self, running):
+        """
+        Kill the running solver with the largest resident set. Returns its name.
+        """
+        def rss(p):
+            try:
+                return psutil.Process(p.pid).memory_info().rss
+            except psutil.Error:
+                return 0
+
+        conn = max(running, key=lambda conn: rss(running[conn]))
+        p = running.pop(conn)
+        print('Memory low: evicting', p.name, 'with', rss(p), 'bytes resident')
+        p.terminate()
+        p.join()
+        conn.close()
+        return p.name
 
     def FindOneNoMemReset(self, create_clauses_fn):
         """
-        Pool-based orchestration with wall-clock timeout (no exceptions),
-        early termination on first solution, and graceful OUTOFMEMORY/ERROR handling.
+        Portfolio race on one shared clause buffer, one process per solver and as
+        many at a time as there are cores and as fit in memory (see Race): the
+        first SAT or UNSAT, or the wall-clock timeout, stops the remaining
+        solvers.
         """
         self._set_filename(create_clauses_fn.__name__)
-        create_clauses_fn()  # fills self.clauses
+        self.nclauses = None
 
         print("Finding solution for k:", self.k, 'd:', self.d, 't:', self.t, 'n:', self.n,)
 
         self.timer = timeit.default_timer()
-        if self.SolutionCached():
+        if self.SolutionCached() or self.ExtendColumn():
             return
 
-        # init state
-        self.solutionExists.value = 0.0
-        self.solution = Array('i', [0] * (self.n * self.t))
+        # Refuse instances whose estimated footprint cannot fit before generating them.
+        fit = self.SolversThatFit()
+        if fit == 0:
+            self.RefuseOutOfMemory()
+            return
 
-        # choose concurrency according to mem pressure & CPU
-        mempercent = psutil.virtual_memory()[2]
-        cpu_count = max(1, os.cpu_count() or 1)
-        desired = min(len(self.solverNames), cpu_count)
-        if mempercent > 70.0:
-            concurrency = 1
-        elif mempercent > 50.0:
-            concurrency = max(1, desired // 2)
-        else:
-            concurrency = desired
+        # Encode once into a compact buffer that every portfolio member maps read-only.
+        try:
+            buffer_path = self.PrepareClauseBuffer(create_clauses_fn)
+        except MemoryError:
+            self.solutionExists.value = -4.0
+            self.time = timeit.default_timer() - self.timer
+            self.PrintSolution()
+            self.UpdateJson()
+            print()
+            return
+        # From here on the buffer is removed however the race ends (Ctrl-C included).
+        try:
+            self.timer = timeit.default_timer()
+
+            # init state
+            self.solutionExists.value = 0.0
+            self.solution = Array('i', [0] * (self.n * self.t))
+
+            # As many solvers as there are cores and as fit next to each other,
+            # the ones that have done best on similar instances first.
+            cpu_count = max(1, os.cpu_count() or 1)
+            concurrency = min(len(self.solverNames), cpu_count, fit)
+            phases = self.WarmStartPhases()
+            self.warmStarted = phases is not None
+            names = self.PortfolioOrder(self.solverNames, concurrency)
+            value, model, _, runs = self.Race(names, buffer_path, concurrency, self.timer + self.timeout, phases)
+            self.RecordSolverRuns(runs)
+        finally:
+            try:
+                os.unlink(buffer_path)
+            except OSError:
+                pass
+
+        if value == 1.0:
+            for i in range(min(len(model), self.n * self.t)):
+                self.solution[i] = model[i]
+        self.solutionExists.value = value
 
-        worker_args = [(name, list(self.clauses)) for name in self.solverNames]
+        self.time = timeit.default_timer() - self.timer
+        self.PrintSolution()
+        self.UpdateJson()
+        print()
 
-        saw_unsat = False
+    def Race(self, names, source, concurrency, deadline, phases=None):
+        """
+        Race the solvers `names`, in order and at most `concurrency` at a time, on
+        `source` (a clause buffer path or an EncodingSpec), woken by their pipes
+        (no polling), until the first SAT or UNSAT or the deadline. Each solver
+        runs under WorkerMemoryLimit, another one starts only while memory has
+        room for it, and while memory is short the largest one is evicted; a
+        solver out of memory or failing leaves the others racing. Returns
+        (value, model, solver, runs), value as in solutionExists.
+        """
+        memory_limit = self.WorkerMemoryLimit(concurrency)
+        solver_bytes = self.EstimateSize()['solver_bytes']
+        start = timeit.default_timer()
+        queued = list(names)
+        running = {}
+        runs = []
+        value, model, winner = 0.0, None, None
         saw_outofmemory = False
-        saw_error = False
 
-        pool = Pool(processes=concurrency, maxtasksperchild=1)
-        async_results = [pool.apply_async(_run_solver_task, (args,)) for args in worker_args]
+        def launch():
+            # Keep `concurrency` solvers running while some are still queued, and
+            # start another one only while the free memory has room for it.
+            while queued and len(running) < concurrency:
+                if running and psutil.virtual_memory().available - self.memoryReserve < solver_bytes:
+                    break
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                name = queued.pop(0)
+                p = multiprocessing.Process(target=_run_solver_pipe,
+                                            args=(name, source, sender, memory_limit, phases),
+                                            name=name, daemon=True)
+                p.start()
+                sender.close()
+                running[receiver] = p
 
         try:
-            deadline = self.timer + self.timeout
-            pending = list(async_results)
+            launch()
+
+            # Block until a solver reports, the deadline passes or it is time to
+            # sample memory; the first SAT or UNSAT ends the race.
+            while running and value == 0.0:
+                remaining = deadline - timeit.default_timer()
+                ready = wait(list(running), timeout=max(0.0, min(remaining, self.memorySampleInterval)))
+                if not ready and remaining <= self.memorySampleInterval:
+                    value = -3.0  # TIMEOUT
+                    break
+
+                # Under memory pressure the largest solver goes, and the rest race on.
+                if not ready and psutil.virtual_memory().available < self.memoryReserve:
+                    name = self.EvictLargestWorker(running)
+                    runs.append((name, 'OUTOFMEMORY', timeit.default_timer() - start))
+                    saw_outofmemory = True
+
+                for conn in ready:
+                    solver_name, sol, model_or_error, nclauses, elapsed = _receive_run(
+                        conn, running.pop(conn), memory_limit, start)
+                    runs.append((solver_name, _run_outcome(sol, model_or_error), elapsed))
+                    if nclauses is not None:
+                        self.nclauses = nclauses
+
+                    # OUTOFMEMORY or an error fails this solver only
+                    if model_or_error == 'OUTOFMEMORY':
+                        saw_outofmemory = True
+                    elif sol is True and model_or_error:
+                        value, model, winner = 1.0, model_or_error, solver_name
+                        break
+                    elif sol is False:
+                        # explicit UNSAT from this backend is definitive
+                        value, winner = -1.0, solver_name
+                        break
 
-            # poll loop (no exceptions)
-            while pending:
-                # timeout check
-                if timeit.default_timer() >= deadline:
-                    self.solutionExists.value = -3.0  # TIMEOUT
-                    pool.terminate()
-                    pool.join()
-                    self.time = timeit.default_timer() - self.timer
-                    self.PrintSolution()
-                    self.UpdateJson()
-                    print()
-                    return
-
-                # check any finished tasks
-                progressed = False
-                for ar in pending[:]:
-                    if ar.ready():
-                        progressed = True
-                        try:
-                            solver_name, sol, model_or_error = ar.get()
-                        except MemoryError:
-                            solver_name, sol, model_or_error = ("<unknown>", None, "OUTOFMEMORY")
-                        except Exception as e:
-                            solver_name, sol, model_or_error = ("<unknown>", None, f"ERROR:{type(e).__name__}:{e}")
-
-                        # handle OUTOFMEMORY
-                        if model_or_error == 'OUTOFMEMORY':
-                            saw_outofmemory = True
-                            if not self.outofmemory:
-                                self.SwitchToSingleSolver(create_clauses_fn)
-                                pool.terminate()
-                                pool.join()
-                                self.solutionExists.value = -4.0
-                                return
-                            pending.remove(ar)
-                            continue
-
-                        # handle generic error
-                        if isinstance(model_or_error, str) and model_or_error.startswith('ERROR:'):
-                            saw_error = True
-                            pending.remove(ar)
-                            continue
-
-                        # solution found
-                        if sol is True and model_or_error:
-                            model = model_or_error
-                            count = min(len(model), self.n * self.t)
-                            self.solution = Array('i', [0] * (self.n * self.t))
-                            for i in range(count):
-                                try:
-                                    self.solution[i] = model[i]
-                                except Exception:
-                                    self.solution[i] = int(model[i]) if isinstance(model[i], int) else 0
-                            self.solutionExists.value = 1.0
-                            pool.terminate()
-                            pool.join()
-                            self.time = timeit.default_timer() - self.timer
-                            self.PrintSolution()
-                            self.UpdateJson()
-                            print()
-                            return
-
-                        # explicit UNSAT from this backend
-                        if sol is False:
-                            saw_unsat = True
-
-                        pending.remove(ar)
-
-                if not progressed:
-                    # avoid busy-wait if nothing ready yet
-                    time.sleep(0.02)
+                if value == 0.0:
+                    launch()
 
         finally:
+            # Stop whatever is still running: the race is decided or the time is up.
+            elapsed = timeit.default_timer() - start
+            for conn, p in running.items():
+                if p.is_alive():
+                    p.terminate()
+                p.join()
+                conn.close()
+                runs.append((p.name, 'TIMEOUT' if value == -3.0 else 'STOPPED', elapsed))
+
+        # no solver answered
+        if value == 0.0:
+            value = -4.0 if saw_outofmemory else -2.0  # UNKNOWN
+        return value, model, winner, runs
+
+    def Cubes(self, workers=1):
+        """
+        Assumption cubes that split the current instance into sub-problems which
+        together cover it. When rows can be permuted freely (no symmetry
+        breaking, not the cyclic construction), some row permutation of every
+        solution has rows 1..w as its first column and takes the rows of its
+        second column first from 1..w, then from w+1..t; the cubes fix the first
+        two columns to each of those shapes. Otherwise they are all the
+        assignments of the first cubeDepth cells of the first column.
+        """
+        var = lambda row, column: row * self.n + column + 1
+        if self.MonotoneInN() and self.SymmetryMode() is None:
+            # Columns of weight about t / (d + 1) come first (the weight of the
+            # last solution when there is one): with fewer workers than cubes,
+            # a satisfiable instance is not stuck behind hard refutations.
+            target = self.t / (self.d + 1)
+            if self.lastModel is not None and self.lastModel[:3] == (self.methodName, self.k, self.d):
+                target = sum(map(len, self.lastModel[5])) / max(1, len(self.lastModel[5]))
+            shapes = [(w, a, b) for w in range(1, self.t + 1)
+                      for a in (range(w + 1) if self.n > 1 else [None])
+                      for b in (range(self.t - w + 1) if self.n > 1 else [None])]
+            if self.n > 1:
+                shapes.sort(key=lambda shape: (abs(shape[0] - target), abs(shape[1] + shape[2] - target), shape[1]))
+            else:
+                shapes.sort(key=lambda shape: abs(shape[0] - target))
+
+            cubes = []
+            for w, a, b in shapes:
+                cube = [var(row, 0) if row < w else -var(row, 0) for row in range(self.t)]
+                if self.n > 1:
+                    cube += [var(row, 1) if row < a or w <= row < w + b else -var(row, 1)
+                             for row in range(self.t)]
+                cubes.append(cube)
+            return cubes
+
+        depth = self.cubeDepth or math.ceil(math.log2(8 * workers))
+        cells = [var(row, 0) for row in range(min(depth, self.t))]
+        return [[lit if bit else -lit for lit, bit in zip(cells, bits)]
+                for bits in itertools.product((1, 0), repeat=len(cells))]
+
+    def FindOneCubes(self, create_clauses_fn):
+        """
+        Cube-and-conquer: split the instance into Cubes and hand them out to one
+        worker per core (as many as fit in memory), each running the best solver
+        of PortfolioOrder on the shared clause buffer under assumptions. The
+        first satisfiable cube answers SAT; UNSAT only once every cube has been
+        refuted. A worker lost to memory leaves its cube open, so the instance
+        ends OUTOFMEMORY (or UNKNOWN) rather than UNSAT.
+        """
+        self._set_filename(create_clauses_fn.__name__)
+        self.nclauses = None
+
+        print("Finding solution (cube and conquer) for k:", self.k, 'd:', self.d, 't:', self.t, 'n:', self.n)
+
+        self.timer = timeit.default_timer()
+        if self.SolutionCached() or self.ExtendColumn():
+            return
+
+        fit = self.SolversThatFit()
+        if fit == 0:
+            self.RefuseOutOfMemory()
+            return
+
+        try:
+            buffer_path = self.PrepareClauseBuffer(create_clauses_fn)
+        except MemoryError:
+            self.solutionExists.value = -4.0
+            self.time = timeit.default_timer() - self.timer
+            self.PrintSolution()
+            self.UpdateJson()
+            print()
+            return
+        # From here on the buffer is removed however the search ends (Ctrl-C included).
+        running = {}
+        tasks = None
+        refuted = 0
+        saw_outofmemory = False
+        try:
+            self.timer = timeit.default_timer()
+
+            self.solutionExists.value = 0.0
+            self.solution = Array('i', [0] * (self.n * self.t))
+
+            workers = min(max(1, os.cpu_count() or 1), fit)
+            memory_limit = self.WorkerMemoryLimit(workers)
+            phases = self.WarmStartPhases()
+            self.warmStarted = phases is not None
+            # Any solver but lingeling, unless it is the only one configured.
+            names = [name for name in self.solverNames if name != 'lingeling'] or list(self.solverNames)
+            name = self.PortfolioOrder(names)[0]
+            cubes = self.Cubes(workers)
+            print('Splitting into', len(cubes), 'cubes over', workers, 'workers running', name)
+
+            tasks = multiprocessing.Queue()
+            for index in range(len(cubes)):
+                tasks.put(index)
+            for _ in range(workers):
+                tasks.put(None)
+
+            for i in range(workers):
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                p = multiprocessing.Process(target=_run_cube_worker,
+                                            args=(name, buffer_path, cubes, tasks, sender, memory_limit, phases),
+                                            name=f'{name}-{i}', daemon=True)
+                p.start()
+                sender.close()
+                running[receiver] = p
+
+            deadline = self.timer + self.timeout
+            while running and self.solutionExists.value == 0.0:
+                ready = wait(list(running), timeout=max(0.0, deadline - timeit.default_timer()))
+                if not ready:
+                    self.solutionExists.value = -3.0  # TIMEOUT
+                    break
+                for conn in ready:
+                    try:
+                        index, sol, model_or_error, nclauses, elapsed = conn.recv()
+                    except (EOFError, OSError):
+                        # Out of cubes, or died without answering (under a memory
+                        # cap, the allocator or the OOM killer).
+                        p = running.pop(conn)
+                        p.join()
+                        conn.close()
+                        if p.exitcode:
+                            saw_outofmemory = saw_outofmemory or bool(memory_limit)
+                        continue
+                    if nclauses is not None:
+                        self.nclauses = nclauses
+                    if sol is True:
+                        count = min(len(model_or_error), self.n * self.t)
+                        for i in range(count):
+                            self.solution[i] = model_or_error[i]
+                        self.solutionExists.value = 1.0
+                        break
+                    if sol is False:
+                        refuted += 1
+                    elif model_or_error == 'OUTOFMEMORY':
+                        saw_outofmemory = True
+                if refuted == len(cubes):
+                    self.solutionExists.value = -1.0
+        finally:
+            for conn, p in running.items():
+                if p.is_alive():
+                    p.terminate()
+                p.join()
+                conn.close()
+            if tasks is not None:
+                tasks.cancel_join_thread()
+                tasks.close()
             try:
-                pool.close()
-            except Exception:
-                pass
-            try:
-                pool.join()
-            except Exception:
+                os.unlink(buffer_path)
+            except OSError:
                 pass
 
-        # no solver produced a model; decide outcome
-        if self.solutionExists.value != 1.0:
-            if saw_outofmemory:
-                self.solutionExists.value = -4.0
-            elif saw_unsat:
-                self.solutionExists.value = -1.0
-            elif saw_error:
-                self.solutionExists.value = -2.0
-            else:
-                self.solutionExists.value = -2.0  # UNKNOWN
+        if self.solutionExists.value == 0.0:
+            self.solutionExists.value = -4.0 if saw_outofmemory else -2.0
 
+        print('Cubes refuted:', refuted, 'of', len(cubes))
         self.time = timeit.default_timer() - self.timer
         self.PrintSolution()
         self.UpdateJson()
         print()
 
-
     def FindOne(self, create_clauses_fn):
         self.solverNames = self.defaultSolverNames
         self.outofmemory = False
@@ -568,15 +1949,124 @@ class CFFSATSolver:
                 self.k = k
                 self.n = initial_n
                 while not self.outofmemorySingleSolver:
-                    self.FindOneNoMemReset(create_clauses_fn)
+                    if self.incremental:
+                        self.FindOneIncremental(create_clauses_fn)
+                    elif self.lazy:
+                        self.FindOneLazy(create_clauses_fn)
+                    elif self.cubeAndConquer:
+                        self.FindOneCubes(create_clauses_fn)
+                    else:
+                        self.FindOneNoMemReset(create_clauses_fn)
 
-                    if self.solutionExists.value == 1.0:
-                        self.n += 1
+                    self.NextInstance()
+                    if self.t == 30:
+                        break
+        self.ExportJson()
+
+    def FindAllFrontier(self, create_clauses_fn):
+        """
+        Drop-in alternative to FindAllParalel that builds the same max-n table.
+        For each t it probes n above the largest known solution with doubling
+        steps, then bisects between the last solution and the first failure
+        (see FindFrontier). The cyclic construction is not monotone in n, so it
+        keeps the linear sweep.
+        """
+        self.solverNames = self.defaultSolverNames
+        self.outofmemory = False
+        self.outofmemorySingleSolver = False
+
+        initial_t = self.t
+        initial_n = self.n
+        probes = 0
+        for d in [2, 3]:
+            self.d = d
+            for k in [1, 2, 3, 4, 5]:
+                self.t = initial_t
+                self.k = k
+                self.n = initial_n
+                self.frontierGrowth = None
+                while not self.outofmemorySingleSolver:
+                    if create_clauses_fn.__name__ == 'CreateClausesCyclicConstruction':
+                        self.FrontierProbe(create_clauses_fn)
+                        probes += 1
+                        self.NextInstance()
                     else:
+                        probes += self.FindFrontier(create_clauses_fn)
                         self.t += 1
                         self.n = self.t
                     if self.t == 30:
                         break
+        print('Frontier search finished after', probes, 'probes')
+        self.ExportJson()
+
+    def FindFrontier(self, create_clauses_fn):
+        """
+        Find the largest n with a solution for the current t, starting from
+        n = self.n. Returns the number of probes. While probes are satisfiable
+        and take less than frontierFastFraction of the timeout, the step doubles,
+        but never beyond how far the frontier moved at the previous t (and not
+        at all before that is known): probes past the frontier are the
+        expensive ones, so the search only gallops where the frontier is known
+        to move fast. A slow probe resets the step to 1. After an overshoot,
+        n just past the last solution is probed before bisecting. A TIMEOUT
+        counts as a failure, as in the linear sweep.
+        """
+        self._set_filename(create_clauses_fn.__name__)
+        lo = max(self.n - 1, self.Store().max_sat_n(self.methodName, self.k, self.d, self.t))
+        start = lo
+        hi = None
+        step = 1
+        probes = 0
+        while hi is None:
+            self.n = lo + step
+            elapsed = self.FrontierProbe(create_clauses_fn)
+            probes += 1
+            if self.outofmemorySingleSolver:
+                return probes
+            if self.solutionExists.value == 1.0:
+                lo = self.n
+                step = step * 2 if elapsed < self.timeout * self.frontierFastFraction else 1
+                step = min(step, max(1, self.frontierGrowth or 0))
+            else:
+                hi = self.n
+
+        # After an overshoot, try the n right past the last solution first.
+        if hi - lo > 2:
+            self.n = lo + 1
+            self.FrontierProbe(create_clauses_fn)
+            probes += 1
+            if self.outofmemorySingleSolver:
+                return probes
+            if self.solutionExists.value == 1.0:
+                lo = self.n
+            else:
+                hi = self.n
+
+        while hi - lo > 1:
+            self.n = (lo + hi) // 2
+            self.FrontierProbe(create_clauses_fn)
+            probes += 1
+            if self.outofmemorySingleSolver:
+                return probes
+            if self.solutionExists.value == 1.0:
+                lo = self.n
+            else:
+                hi = self.n
+        self.frontierGrowth = lo - start
+        return probes
+
+    def FrontierProbe(self, create_clauses_fn):
+        # Solve (or look up) the current instance; returns the wall time spent.
+        start = timeit.default_timer()
+        if self.incremental:
+            self.FindOneIncremental(create_clauses_fn)
+        elif self.lazy:
+            self.FindOneLazy(create_clauses_fn)
+        elif self.cubeAndConquer:
+            self.FindOneCubes(create_clauses_fn)
+        else:
+            self.FindOneNoMemReset(create_clauses_fn)
+        return timeit.default_timer() - start
 
     def FindOneSingleSolver(self, create_clauses_fn, solver_name=None, timeout_seconds=None):
         """
@@ -584,12 +2074,12 @@ class CFFSATSolver:
         Uses self.timeout when timeout_seconds is None.
         """
         self._set_filename(create_clauses_fn.__name__)
-        create_clauses_fn()
+        self.nclauses = None
 
         print("Finding solution (single solver) for k:", self.k, 'd:', self.d, 't:', self.t, 'n:', self.n)
 
         self.timer = timeit.default_timer()
-        if self.SolutionCached():
+        if self.SolutionCached() or self.ExtendColumn():
             return
 
         self.solutionExists.value = 0.0
@@ -604,21 +2094,43 @@ class CFFSATSolver:
         if timeout is None or timeout <= 0:
             timeout = 1200
 
-        result_queue = multiprocessing.Queue()
+        if self.SolversThatFit() == 0:
+            self.RefuseOutOfMemory()
+            return
 
-        def worker(q, name, clauses):
-            q.put(_run_solver_task((name, clauses)))
+        # With the encoding cache the worker reads a clause buffer, otherwise it
+        # streams the encoding itself. The buffer is removed however the run
+        # ends (Ctrl-C included).
+        source = self.EncodingSpec()
+        p = None
+        try:
+            if self.encodingCache:
+                source = self.PrepareClauseBuffer(create_clauses_fn)
+                self.timer = timeit.default_timer()
 
-        p = multiprocessing.Process(target=worker, args=(result_queue, solver_name, list(self.clauses)))
-        p.start()
-        p.join(timeout)
+            phases = self.WarmStartPhases()
+            self.warmStarted = phases is not None
+            result_queue = multiprocessing.Queue()
 
-        if p.is_alive():
+            def worker(q, name, source):
+                q.put(_run_solver_task((name, source, phases)))
+
+            p = multiprocessing.Process(target=worker, args=(result_queue, solver_name, source))
+            p.start()
+            p.join(timeout)
+            timed_out = p.is_alive()
+        finally:
+            if p is not None and p.is_alive():
+                p.terminate()
+                p.join()
+            if isinstance(source, str):
+                os.unlink(source)
+
+        if timed_out:
             # solver didn't finish in time
-            p.terminate()
-            p.join()
             self.solutionExists.value = -3.0  # TIMEOUT
             self.time = timeit.default_timer() - self.timer
+            self.RecordSolverRuns([(solver_name, 'TIMEOUT', self.time)])
             self.PrintSolution()
             self.UpdateJson()
             print()
@@ -626,7 +2138,7 @@ class CFFSATSolver:
         else:
             # process finished — try to read result (wait up to 1s for the queue)
             try:
-                name, sol, model_or_error = result_queue.get(timeout=1.0)
+                name, sol, model_or_error, nclauses, elapsed = result_queue.get(timeout=1.0)
             except Exception:
                 # nothing in queue or other error
                 self.solutionExists.value = -2.0  # ERROR
@@ -636,6 +2148,9 @@ class CFFSATSolver:
                 print()
                 return
 
+            if nclauses is not None:
+                self.nclauses = nclauses
+
             # interpret result same way as pool version
             if model_or_error == 'OUTOFMEMORY':
                 self.solutionExists.value = -4.0
@@ -653,6 +2168,7 @@ class CFFSATSolver:
                 self.solutionExists.value = -1.0
             else:
                 self.solutionExists.value = -2.0
+            self.RecordSolverRuns([(name, _run_outcome(sol, model_or_error), elapsed)])
 
         self.time = timeit.default_timer() - self.timer
         self.PrintSolution()
@@ -660,6 +2176,356 @@ class CFFSATSolver:
         print()
 
 
+    def _SolveInterruptible(self, solver, assumptions, timeout=None):
+        """
+        In-process solve under assumptions, interrupted after `timeout` seconds
+        (default self.timeout). Returns True, False, None (TIMEOUT) or 'OUTOFMEMORY'.
+        """
+        timer = threading.Timer(max(0.0, self.timeout if timeout is None else timeout), solver.interrupt)
+        timer.start()
+        try:
+            return solver.solve_limited(assumptions=assumptions, expect_interrupt=True)
+        except NotImplementedError:
+            return solver.solve(assumptions=assumptions)
+        except MemoryError:
+            return 'OUTOFMEMORY'
+        finally:
+            timer.cancel()
+            solver.clear_interrupt()
+
+    def FindOneIncremental(self, create_clauses_fn, solver_name=None):
+        """
+        Solve the current instance on the incremental session kept alive for this
+        method, k, d and t: only the clauses mentioning the columns added since the
+        previous call are encoded, and learned clauses carry over. Runs in-process;
+        the timeout interrupts the solver (backends without interrupt support,
+        i.e. lingeling, run unbounded). Sessions only build the one-hot
+        witnesses, so CreateClausesLogDisjunctMatrices runs FindOneNoMemReset.
+        """
+        if create_clauses_fn.__name__ == 'CreateClausesLogDisjunctMatrices':
+            incremental, self.incremental = self.incremental, False
+            try:
+                self.FindOneNoMemReset(create_clauses_fn)
+            finally:
+                self.incremental = incremental
+            return
+        self._set_filename(create_clauses_fn.__name__)
+        if solver_name is None:
+            solver_name = self.singleSolverName
+
+        print("Finding solution (incremental) for k:", self.k, 'd:', self.d, 't:', self.t, 'n:', self.n)
+
+        self.timer = timeit.default_timer()
+        key = (self.methodName, self.k, self.d, self.t, solver_name, self.symmetryBreaking)
+        try:
+            if self.incSolver is None or self.incKey != key or len(self.incMatrix[0]) > self.n:
+                self.IncrementalReset(solver_name)
+            while len(self.incMatrix[0]) < self.n:
+                self.IncrementalAddColumn()
+        except MemoryError:
+            self.incKey = None
+            self.nclauses = None
+            self.solutionExists.value = -4.0
+            self.time = timeit.default_timer() - self.timer
+            if self.methodName == 'CreateClausesWeightedK':
+                self.cardinalityUsed = ('seqcounter-incremental', *self.incCardinality)
+            self.PrintSolution()
+            self.UpdateJson()
+            print()
+            return
+        self.nclauses = self.incClauses
+
+        if self.SolutionCached():
+            return
+
+        self.solutionExists.value = 0.0
+        self.solution = Array('i', [0] * (self.n * self.t))
+
+        assumptions = [] if self.incGuard is None else [self.incGuard]
+        phases = self.WarmStartPhases(lambda row, column: self.incMatrix[row][column])
+        self.warmStarted = phases is not None
+        if phases:
+            try:
+                self.incSolver.set_phases(phases)
+            except NotImplementedError:
+                pass
+        sol = self._SolveInterruptible(self.incSolver, assumptions)
+
+        if sol is True:
+            model = self.incSolver.get_model()
+            for row in range(self.t):
+                for column in range(self.n):
+                    i = row * self.n + column
+                    self.solution[i] = i + 1 if model[self.incMatrix[row][column] - 1] > 0 else -(i + 1)
+            self.solutionExists.value = 1.0
+        elif sol is False:
+            self.solutionExists.value = -1.0
+        elif sol == 'OUTOFMEMORY':
+            self.incKey = None
+            self.solutionExists.value = -4.0
+        else:
+            self.solutionExists.value = -3.0  # TIMEOUT
+
+        self.time = timeit.default_timer() - self.timer
+        if self.methodName == 'CreateClausesWeightedK':
+            self.cardinalityUsed = ('seqcounter-incremental', *self.incCardinality)
+        self.PrintSolution()
+        self.UpdateJson()
+        print()
+
+    def FindOneLazy(self, create_clauses_fn, solver_name=None):
+        """
+        Counterexample-guided solve of the d-cover constraints of
+        CreateClausesDisjunctMatrices and CreateClausesWeightedK. The solver
+        starts with every column separated from every other single column (and
+        the row weights, as a cardinality encoding, and the symmetry breaking).
+        Each model is checked with cover_violations, and only the covers found,
+        as (column, d covering columns), get their separating clauses before
+        the next, incremental, solve. A model without covers is a solution;
+        UNSAT on a subset of the constraints is UNSAT. Far fewer than the
+        C(n, d+1) witness sets of the full encoding are ever generated. The
+        cyclic construction, and CreateClausesLogDisjunctMatrices (whose log
+        witnesses are not the one-hot ones added here), run FindOneNoMemReset
+        instead.
+        """
+        if create_clauses_fn.__name__ in ('CreateClausesCyclicConstruction', 'CreateClausesLogDisjunctMatrices'):
+            self.FindOneNoMemReset(create_clauses_fn)
+            return
+        self._set_filename(create_clauses_fn.__name__)
+        self.nclauses = None
+        if solver_name is None:
+            solver_name = self.singleSolverName
+
+        print("Finding solution (lazy) for k:", self.k, 'd:', self.d, 't:', self.t, 'n:', self.n)
+
+        self.timer = timeit.default_timer()
+        if self.SolutionCached() or self.ExtendColumn():
+            return
+
+        self.solutionExists.value = 0.0
+        self.solution = Array('i', [0] * (self.n * self.t))
+        deadline = self.timer + self.timeout
+
+        m = [[row * self.n + column + 1 for column in range(self.n)] for row in range(self.t)]
+        self.nvars = self.t * self.n
+
+        def separating(covers):
+            for column, coveringColumns in covers:
+                ys = yield from self._SeparatingClauses(m, column, list(coveringColumns))
+                yield ys
+
+        encoding = self.cardinalityEncoding or 'seqcounter'
+        counts = [0, 0]
+
+        def cardinality():
+            for row in range(self.t):
+                enc = CardEnc.atmost(lits=m[row], bound=self.k, top_id=self.nvars,
+                                     encoding=getattr(EncType, encoding))
+                counts[0] += len(enc.clauses)
+                counts[1] += max(self.nvars, enc.nv) - self.nvars
+                self.nvars = max(self.nvars, enc.nv)
+                yield from enc.clauses
+
+        rounds = 0
+        covers = 0
+        solver = None
+        try:
+            solver = Solver(name=solver_name)
+            self.nclauses = 0
+            pairs = [(column, (other,)) for column in range(self.n) for other in range(self.n) if other != column]
+            initial = [separating(pairs), self.SymmetryBreakingClauses(m)]
+            if self.methodName == 'CreateClausesWeightedK':
+                initial.append(cardinality())
+            for clauses in initial:
+                for chunk in _chunked(clauses, 4096):
+                    solver.append_formula(chunk)
+                    self.nclauses += len(chunk)
+
+            phases = self.WarmStartPhases()
+            self.warmStarted = phases is not None
+            if phases:
+                try:
+                    solver.set_phases(phases)
+                except NotImplementedError:
+                    pass
+
+            while True:
+                if timeit.default_timer() >= deadline:
+                    sol = None  # TIMEOUT
+                    break
+                rounds += 1
+                sol = self._SolveInterruptible(solver, [], deadline - timeit.default_timer())
+                if sol is not True:
+                    break
+                model = solver.get_model()
+                blocks = [[row + 1 for row in range(self.t) if model[m[row][column] - 1] > 0]
+                          for column in range(self.n)]
+                violations = cover_violations(blocks, self.d, self.lazyBatch)
+                if not violations:
+                    for i in range(self.n * self.t):
+                        self.solution[i] = model[i]
+                    break
+                covers += len(violations)
+                clauses = list(separating(violations))
+                solver.append_formula(clauses)
+                self.nclauses += len(clauses)
+        except MemoryError:
+            sol = 'OUTOFMEMORY'
+        finally:
+            if solver is not None:
+                solver.delete()
+
+        if sol is True:
+            self.solutionExists.value = 1.0
+        elif sol is False:
+            self.solutionExists.value = -1.0
+        elif sol == 'OUTOFMEMORY':
+            self.solutionExists.value = -4.0
+        else:
+            self.solutionExists.value = -3.0  # TIMEOUT
+
+        print('Lazy rounds:', rounds, 'covers added:', covers)
+        self.lazyStats = {'rounds': rounds, 'covers': covers}
+        if self.methodName == 'CreateClausesWeightedK':
+            self.cardinalityUsed = (encoding, *counts)
+        self.time = timeit.default_timer() - self.timer
+        self.PrintSolution()
+        self.UpdateJson()
+        print()
+
+    def FindMinRows(self, create_clauses_fn, t_max=None, t_min=1, solver_name=None):
+        """
+        Smallest t for which the current n is SAT, searched on one warm solver.
+        The encoding is built once for t_max rows (default min(n, self.maxRows);
+        t = n is always SAT) and every row gets an enable literal. A disabled row is
+        forced to zero, which is the same as dropping it. Each t is one
+        solve(assumptions=...) with the first t_max - t rows disabled; keeping the
+        zero rows first is consistent with the row-lex symmetry breaking. UNSAT
+        cores let the search skip the values of t that disable every row in them.
+        Every (t, n) settled is recorded; returns the smallest SAT t, or None.
+        """
+        self._set_filename(create_clauses_fn.__name__)
+        if solver_name is None:
+            solver_name = self.singleSolverName
+        if t_max is None:
+            t_max = min(self.n, self.maxRows)
+        n = self.n
+
+        self.t = t_max
+        self.rowActivation = t_max
+        solver = Solver(name=solver_name)
+        try:
+            self.nclauses = 0
+            for chunk in _chunked(create_clauses_fn(), 4096):
+                solver.append_formula(chunk)
+                self.nclauses += len(chunk)
+            enable = []
+            for row in range(t_max):
+                e = self._NewVar()
+                enable.append(e)
+                for column in range(n):
+                    solver.add_clause([-(row * n + column + 1), e])
+                self.nclauses += n
+        except MemoryError:
+            solver.delete()
+            self.rowActivation = None
+            self.t = t_min
+            self.nclauses = None
+            self.solutionExists.value = -4.0
+            self.time = 0.0
+            self.PrintSolution()
+            self.UpdateJson()
+            print()
+            return None
+
+        found = None
+        t = t_min
+        try:
+            while t <= t_max:
+                self.t = t
+                print("Finding solution (row activation) for k:", self.k, 'd:', self.d, 't:', self.t, 'n:', self.n)
+
+                self.timer = timeit.default_timer()
+                if self.SolutionCached():
+                    if self.solutionExists.value == 1.0:
+                        found = t
+                        break
+                    t += 1
+                    continue
+
+                self.solutionExists.value = 0.0
+                self.solution = Array('i', [0] * (n * t))
+                assumptions = [-e for e in enable[:t_max - t]]
+                sol = self._SolveInterruptible(solver, assumptions)
+
+                next_t = t + 1
+                if sol is True:
+                    model = solver.get_model()
+                    for row in range(t):
+                        for column in range(n):
+                            i = row * n + column
+                            var = (t_max - t + row) * n + column + 1
+                            self.solution[i] = i + 1 if model[var - 1] > 0 else -(i + 1)
+                    self.solutionExists.value = 1.0
+                elif sol is False:
+                    # Every t that still disables the rows of the core is UNSAT too:
+                    # those below t_max minus the highest disabled row.
+                    core = solver.get_core()
+                    if core:
+                        next_t = max(next_t, t_max - max(enable.index(-lit) for lit in core))
+                    self.solutionExists.value = -1.0
+                elif sol == 'OUTOFMEMORY':
+                    self.solutionExists.value = -4.0
+                else:
+                    self.solutionExists.value = -3.0  # TIMEOUT
+
+                # The size of (t, n) itself (ClauseCount), not of the t_max formula.
+                self.nclauses = None
+                self.time = timeit.default_timer() - self.timer
+                self.PrintSolution()
+                self.UpdateJson()
+                print()
+
+                # Only a model that passed verification in UpdateJson settles t.
+                if self.solutionExists.value == 1.0:
+                    found = t
+                if found is not None or sol == 'OUTOFMEMORY':
+                    break
+                t = next_t
+        finally:
+            self.rowActivation = None
+            solver.delete()
+
+        if found is not None:
+            print('Smallest t for k:', self.k, 'd:', self.d, 'n:', n, 'is', found, '\n')
+        return found
+
+    def FindAllRows(self, create_clauses_fn, solver_name=None):
+        """
+        Sweep over n with FindMinRows instead of over t: the max-n table follows
+        from the smallest t of every n. Except for the cyclic construction that
+        smallest t never decreases with n, so each search starts where the
+        previous one ended.
+        """
+        self.outofmemory = False
+        self.outofmemorySingleSolver = False
+
+        initial_n = self.n
+        for d in [2, 3]:
+            self.d = d
+            for k in [1, 2, 3, 4, 5]:
+                self.k = k
+                self.n = initial_n
+                t_min = 1
+                while True:
+                    t = self.FindMinRows(create_clauses_fn, None, t_min, solver_name)
+                    if t is None:
+                        break
+                    if create_clauses_fn.__name__ != 'CreateClausesCyclicConstruction':
+                        t_min = t
+                    self.n += 1
+        self.ExportJson()
+
     def FindAllSingleSolver(self, create_clauses_fn, solvers_name=['glucose4']):
         """
         Sequential search like FindAll, but always runs one solver only.
@@ -679,27 +2545,38 @@ class CFFSATSolver:
                 for solver_name in solvers_name:
                     print("Running single-solver:", solver_name)
                     while not self.outofmemorySingleSolver:
-                        # pass self.timeout so the single-solver run uses the same timeout you configured
-                        self.FindOneSingleSolver(create_clauses_fn, solver_name, self.timeout)
-
-                        if self.solutionExists.value == 1.0:
-                            self.n += 1
+                        if self.incremental:
+                            self.FindOneIncremental(create_clauses_fn, solver_name)
+                        elif self.lazy:
+                            self.FindOneLazy(create_clauses_fn, solver_name)
                         else:
-                            self.t += 1
-                            self.n = self.t
+                            # pass self.timeout so the single-solver run uses the same timeout you configured
+                            self.FindOneSingleSolver(create_clauses_fn, solver_name, self.timeout)
 
+                        self.NextInstance()
                         if self.t == 30:
                             break
+        self.ExportJson()
 
 
 if __name__ == '__main__':
     solver = CFFSATSolver(0, 2)
     solver.timeout = 600
+    # solver.cardinalityEncoding = 'seqcounter'
+    # solver.symmetryBreaking = 'doublelex'
+    # solver.incremental = True
+    # solver.cubeAndConquer = True
+    # solver.circulant = True
+    # solver.lazy = True
+    # solver.warmStart = True
     try:
         # solver.FindAllParalel(solver.CreateClausesWeightedK)
+        # solver.FindAllFrontier(solver.CreateClausesWeightedK)
+        # (all k and d lanes at once: python scheduler.py CreateClausesWeightedK 600)
         solver.FindAllSingleSolver(solver.CreateClausesWeightedK, solver.defaultSolverNames)
+        # solver.FindAllRows(solver.CreateClausesWeightedK)
         # solver.FindOne()
     except KeyboardInterrupt:
         print("\n[!] Interrupted by user, saving JSON before exit...")
-        # solver.UpdateJson()
+        solver.ExportJson()
         sys.exit(0)
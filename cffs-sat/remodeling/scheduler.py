@@ -0,0 +1,252 @@
+import os
+import sys
+import timeit
+import psutil
+import multiprocessing
+from multiprocessing.connection import wait
+from main import CFFSATSolver, _run_solver_pipe, _receive_run, _run_outcome
+
+
+class SweepScheduler:
+    """
+    Run the (t, n) sweeps of many (method, k, d) lanes at once, one instance per
+    lane at a time, so that the sub-second instances of every lane share the
+    cores instead of waiting for each other.
+
+    An instance first gets a single solver for quickTimeout seconds. Each time
+    a stage runs out of time the portfolio doubles (and the stage budget grows
+    4x) until the whole portfolio runs for the rest of the timeout, so only the
+    instances that have proven hard take several cores. Admission is memory
+    aware: an instance starts only if EstimateSize says its solvers fit next to
+    the ones already running, and is refused as OUTOFMEMORY when it would not
+    fit even alone.
+    """
+
+    def __init__(self, methods, ks=(1, 2, 3, 4, 5), ds=(2, 3), timeout=60,
+                 quick_timeout=2.0, max_jobs=None, output_folder='cffdata'):
+        self.lanes = []
+        for method in methods:
+            for d in ds:
+                for k in ks:
+                    cff = CFFSATSolver(k, d)
+                    cff.timeout = timeout
+                    cff.outputFolder = output_folder
+                    cff._set_filename(method)
+                    self.lanes.append(cff)
+        self.methods = methods
+        self.timeout = timeout
+        self.quickTimeout = quick_timeout
+        self.maxJobs = max_jobs or max(1, os.cpu_count() or 1)
+        self.solverNames = self.lanes[0].defaultSolverNames if self.lanes else []
+        # Lanes waiting for a start, as (lane, stage, start time of the instance
+        # or None for a new one, whether NextToSolve has already resolved the
+        # instance), and the running instances, one dict per lane.
+        self.waiting = [(cff, 0, None, False) for cff in self.lanes]
+        self.running = []
+
+    def Width(self, stage):
+        return min(2 ** stage, len(self.solverNames), self.maxJobs)
+
+    def Footprint(self, cff, width):
+        # Bytes an instance needs with `width` solvers (a shared buffer only when width > 1).
+        estimate = cff.EstimateSize()
+        return (estimate['buffer_bytes'] if width > 1 else 0) + width * estimate['solver_bytes']
+
+    def NextToSolve(self, cff):
+        """
+        Advance a lane past the instances the store answers (directly or by
+        inference). Returns False once the lane is past maxRows.
+        """
+        while cff.t <= cff.maxRows:
+            cff.nclauses = None
+            if not cff.SolutionCached() and not cff.ExtendColumn():
+                return True
+            cff.NextInstance()
+        return False
+
+    def Requeue(self, cff):
+        # Move a lane on to its next instance, resolved once here rather than on every Admit.
+        cff.NextInstance()
+        if self.NextToSolve(cff):
+            self.waiting.append((cff, 0, None, True))
+
+    def Start(self, cff, stage, start):
+        """
+        Launch the first Width(stage) solvers of the portfolio on the lane's
+        current instance. A single solver streams the clauses itself; wider
+        portfolios share a clause buffer written here.
+        """
+        width = self.Width(stage)
+        names = cff.PortfolioOrder(self.solverNames)[:width]
+        method = getattr(cff, cff.methodName)
+        buffer_path = cff.PrepareClauseBuffer(method) if width > 1 else None
+        source = buffer_path if buffer_path is not None else cff.EncodingSpec()
+        memory_limit = cff.WorkerMemoryLimit(self.maxJobs)
+        phases = cff.WarmStartPhases()
+        cff.warmStarted = phases is not None
+
+        job = {
+            'lane': cff,
+            'stage': stage,
+            'width': width,
+            'bytes': self.Footprint(cff, width),
+            'buffer': buffer_path,
+            'start': start,
+            'started': timeit.default_timer(),
+            'deadline': min(start + self.timeout,
+                            timeit.default_timer() + self.quickTimeout * 4 ** stage)
+                        if width < min(len(self.solverNames), self.maxJobs) else start + self.timeout,
+            'processes': {},
+            'outcomes': [],
+            'runs': [],
+            'memory_limit': memory_limit,
+        }
+        for name in names:
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            p = multiprocessing.Process(target=_run_solver_pipe, args=(name, source, sender, memory_limit, phases),
+                                        name=name, daemon=True)
+            p.start()
+            sender.close()
+            job['processes'][receiver] = p
+        print("Scheduled k:", cff.k, 'd:', cff.d, 't:', cff.t, 'n:', cff.n,
+              'method:', cff.methodName, 'solvers:', width)
+        self.running.append(job)
+
+    def Stop(self, job, outcome='STOPPED'):
+        # Kill the solvers still running (recorded with `outcome`) and free the instance.
+        elapsed = timeit.default_timer() - job['started']
+        for conn, p in job['processes'].items():
+            if p.is_alive():
+                p.terminate()
+            p.join()
+            conn.close()
+            job['runs'].append((p.name, outcome, elapsed))
+        job['processes'] = {}
+        job['lane'].RecordSolverRuns(job['runs'])
+        if job['buffer'] is not None:
+            try:
+                os.unlink(job['buffer'])
+            except OSError:
+                pass
+        self.running.remove(job)
+
+    def Finish(self, job, value, model=None, nclauses=None):
+        # Record the outcome of the lane's instance and move the lane on.
+        self.Stop(job, 'TIMEOUT' if value == -3.0 else 'STOPPED')
+        cff = job['lane']
+        cff.solutionExists.value = value
+        cff.solution = list(model[:cff.n * cff.t]) if model else []
+        cff.nclauses = nclauses
+        cff.time = timeit.default_timer() - job['start']
+        cff.PrintSolution()
+        cff.UpdateJson()
+        print()
+        self.Requeue(cff)
+
+    def Collect(self, conn):
+        job = next(job for job in self.running if conn in job['processes'])
+        name, sol, model_or_error, nclauses, elapsed = _receive_run(
+            conn, job['processes'].pop(conn), job['memory_limit'], job['started'])
+        job['runs'].append((name, _run_outcome(sol, model_or_error), elapsed))
+
+        if sol is True and model_or_error:
+            self.Finish(job, 1.0, model_or_error, nclauses)
+        elif sol is False:
+            self.Finish(job, -1.0, None, nclauses)
+        else:
+            job['outcomes'].append(model_or_error)
+            if not job['processes']:
+                value = -4.0 if 'OUTOFMEMORY' in job['outcomes'] else -2.0
+                self.Finish(job, value)
+
+    def Expire(self):
+        now = timeit.default_timer()
+        for job in self.running[:]:
+            if now < job['deadline']:
+                continue
+            if job['deadline'] >= job['start'] + self.timeout:
+                self.Finish(job, -3.0)
+            else:
+                # Proven hard: back to the front of the queue with a wider portfolio.
+                self.Stop(job, 'TIMEOUT')
+                self.waiting.insert(0, (job['lane'], job['stage'] + 1, job['start'], True))
+
+    def Admit(self):
+        """
+        Start waiting lanes while cores and memory allow. Lanes escalated to a
+        wider portfolio come first, and nothing overtakes one that does not fit
+        yet, so hard instances are not starved by the easy ones. A lane's
+        instance is resolved (NextToSolve) once, when it enters the queue; here
+        it is only checked against the free cores and memory.
+        """
+        for entry in self.waiting[:]:
+            cff, stage, start, resolved = entry
+            if not resolved:
+                index = self.waiting.index(entry)
+                if not self.NextToSolve(cff):
+                    del self.waiting[index]
+                    continue
+                entry = self.waiting[index] = (cff, stage, start, True)
+
+            width = self.Width(stage)
+            need = self.Footprint(cff, width)
+            cores = sum(job['width'] for job in self.running)
+            room = psutil.virtual_memory().available - sum(job['bytes'] for job in self.running)
+            if cores + width > self.maxJobs or need > room:
+                if not self.running and need > psutil.virtual_memory().available:
+                    self.waiting.remove(entry)
+                    cff.RefuseOutOfMemory()
+                    self.Requeue(cff)
+                    continue
+                if stage > 0:
+                    break
+                continue
+
+            self.waiting.remove(entry)
+            cff.timer = timeit.default_timer()
+            try:
+                self.Start(cff, stage, start if start is not None else cff.timer)
+            except MemoryError:
+                cff.solutionExists.value = -4.0
+                cff.time = timeit.default_timer() - cff.timer
+                cff.PrintSolution()
+                cff.UpdateJson()
+                print()
+                self.Requeue(cff)
+
+    def Run(self):
+        while self.waiting or self.running:
+            self.Admit()
+            if not self.running:
+                continue
+
+            # Sleep until a solver reports or the nearest stage deadline.
+            timeout = min(job['deadline'] for job in self.running) - timeit.default_timer()
+            conns = [conn for job in self.running for conn in job['processes']]
+            for conn in wait(conns, timeout=max(0.0, timeout)):
+                # A sibling's answer may already have stopped this instance.
+                if any(conn in job['processes'] for job in self.running):
+                    self.Collect(conn)
+            self.Expire()
+        self.ExportJson()
+
+    def ExportJson(self):
+        for method in self.methods:
+            next(cff for cff in self.lanes if cff.methodName == method).ExportJson()
+
+
+if __name__ == '__main__':
+    # python scheduler.py CreateClausesMethodName [timeout]
+    if len(sys.argv) not in (2, 3):
+        print("Usage:")
+        print("  python scheduler.py <CreateClausesMethodName> [timeout]")
+        sys.exit(1)
+    scheduler = SweepScheduler([sys.argv[1]], timeout=float(sys.argv[2]) if len(sys.argv) == 3 else 600)
+    try:
+        scheduler.Run()
+    except KeyboardInterrupt:
+        print("\n[!] Interrupted by user, exporting JSON before exit...")
+        for job in scheduler.running[:]:
+            scheduler.Stop(job)
+        scheduler.ExportJson()
+        sys.exit(0)
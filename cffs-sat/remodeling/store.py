@@ -0,0 +1,292 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+import jsbeautifier
+
+
+class ResultStore:
+    """
+    SQLite-backed results, indexed by (method, k, d, t, n).
+
+    Writes are single transactions, and the database runs in WAL mode with a
+    busy timeout, so several sweeps (processes) can share one file. The
+    data_k_*_d_*.json files are imported the first time their (method, k, d) is
+    used and can be exported again, with their .overleaf tables, on demand.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = None
+        self.pid = None
+
+    def _connect(self):
+        # Connections must not cross a fork, so each process opens its own.
+        if self.connection is None or self.pid != os.getpid():
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self.pid = os.getpid()
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' method TEXT NOT NULL, k INTEGER NOT NULL, d INTEGER NOT NULL,'
+                ' t INTEGER NOT NULL, n INTEGER NOT NULL,'
+                ' clauses INTEGER, time REAL, solution TEXT NOT NULL, info TEXT,'
+                ' PRIMARY KEY (method, k, d, t, n))')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS imported (path TEXT PRIMARY KEY)')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS solver_runs ('
+                ' method TEXT NOT NULL, k INTEGER NOT NULL, d INTEGER NOT NULL,'
+                ' t INTEGER NOT NULL, n INTEGER NOT NULL,'
+                ' solver TEXT NOT NULL, outcome TEXT NOT NULL, time REAL NOT NULL)')
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS solver_runs_region ON solver_runs (method, d, t, n)')
+        return self.connection
+
+    @staticmethod
+    def _record(row):
+        k, d, t, n, clauses, time, solution, info = row
+        record = {'k': k, 'd': d, 't': t, 'n': n, 'clauses': clauses, 'time': time}
+        if info:
+            record.update(json.loads(info))
+        record['solution'] = json.loads(solution)
+        return record
+
+    def get(self, method, k, d, t, n):
+        """
+        The record of one instance, shaped like a JSON entry, or None.
+        """
+        row = self._connect().execute(
+            'SELECT k, d, t, n, clauses, time, solution, info FROM results'
+            ' WHERE method = ? AND k = ? AND d = ? AND t = ? AND n = ?',
+            (method, k, d, t, n)).fetchone()
+        return None if row is None else self._record(row)
+
+    def put(self, method, record):
+        """
+        Insert a record, or update an existing one the way UpdateJson always did:
+        a new SAT or UNSAT replaces anything but UNSAT, other outcomes only fill
+        in missing instances. An answer replacing a failed run replaces the
+        whole record.
+        """
+        info = {key: value for key, value in record.items()
+                if key not in ('k', 'd', 't', 'n', 'clauses', 'time', 'solution')}
+        key = (method, record['k'], record['d'], record['t'], record['n'])
+        solution = json.dumps(record['solution'])
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT solution FROM results'
+                ' WHERE method = ? AND k = ? AND d = ? AND t = ? AND n = ?', key).fetchone()
+            if row is None:
+                connection.execute(
+                    'INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    key + (record.get('clauses'), record.get('time'), solution,
+                           json.dumps(info) if info else None))
+            elif json.loads(row[0]) != 'UNSAT' and (
+                    isinstance(record['solution'], list) or record['solution'] == 'UNSAT'):
+                previous = json.loads(row[0])
+                if not (isinstance(previous, list) and previous):
+                    # An answer replacing a failed run (TIMEOUT, UNKNOWN, ...) takes
+                    # its size, time and modes from the run that found it.
+                    connection.execute(
+                        'UPDATE results SET clauses = ?, time = ?, solution = ?, info = ?'
+                        ' WHERE method = ? AND k = ? AND d = ? AND t = ? AND n = ?',
+                        (record.get('clauses'), record.get('time'), solution,
+                         json.dumps(info) if info else None) + key)
+                else:
+                    # An answer that did not come from a solver also records where
+                    # it came from (inference, bound, construction, extension).
+                    provenance = info.keys() & {'derived', 'bound', 'construction', 'extension'}
+                    connection.execute(
+                        'UPDATE results SET solution = ?, info = coalesce(?, info)'
+                        ' WHERE method = ? AND k = ? AND d = ? AND t = ? AND n = ?',
+                        (solution, json.dumps(info) if provenance else None) + key)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def records(self, method, k=None, d=None):
+        """
+        Records of a method (optionally one k and d), in the order of the JSON files.
+        """
+        query = 'SELECT k, d, t, n, clauses, time, solution, info FROM results WHERE method = ?'
+        args = [method]
+        if k is not None:
+            query += ' AND k = ?'
+            args.append(k)
+        if d is not None:
+            query += ' AND d = ?'
+            args.append(d)
+        query += ' ORDER BY k, d, t, n DESC'
+        return [self._record(row) for row in self._connect().execute(query, args)]
+
+    def sat_witness(self, method, k, d, t, n, same_n=False):
+        """
+        A solved instance with at most t rows and at least n columns (exactly n
+        with same_n), the closest one first, or None.
+        """
+        row = self._connect().execute(
+            'SELECT k, d, t, n, clauses, time, solution, info FROM results'
+            ' WHERE method = ? AND k = ? AND d = ? AND t <= ? AND n ' + ('=' if same_n else '>=') + ' ?'
+            " AND solution LIKE '[%' AND solution != '[]'"
+            ' ORDER BY t DESC, n LIMIT 1', (method, k, d, t, n)).fetchone()
+        return None if row is None else self._record(row)
+
+    def unsat_witness(self, method, k, d, t, n, same_n=False):
+        """
+        An UNSAT instance with at least t rows and at most n columns (exactly n
+        with same_n), the closest one first, or None.
+        """
+        row = self._connect().execute(
+            'SELECT k, d, t, n, clauses, time, solution, info FROM results'
+            ' WHERE method = ? AND k = ? AND d = ? AND t >= ? AND n ' + ('=' if same_n else '<=') + ' ?'
+            ' AND solution = ?'
+            ' ORDER BY t, n DESC LIMIT 1', (method, k, d, t, n, json.dumps('UNSAT'))).fetchone()
+        return None if row is None else self._record(row)
+
+    def max_sat_n(self, method, k, d, t):
+        """
+        The largest n solved with at most t rows, or 0.
+        """
+        row = self._connect().execute(
+            'SELECT max(n) FROM results WHERE method = ? AND k = ? AND d = ? AND t <= ?'
+            " AND solution LIKE '[%' AND solution != '[]'", (method, k, d, t)).fetchone()
+        return row[0] or 0
+
+    def add_solver_runs(self, method, k, d, t, n, runs):
+        """
+        Record the (solver, outcome, seconds) runs of one instance. The outcome is
+        SAT, UNSAT, TIMEOUT, OUTOFMEMORY, ERROR, or STOPPED when another
+        solver answered first.
+        """
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO solver_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(method, k, d, t, n, solver, outcome, seconds) for solver, outcome, seconds in runs])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def solver_stats(self, method, d, cells_min=None, cells_max=None):
+        """
+        Per solver, its number of runs, of solved runs, and its mean PAR-2 time
+        (a run without an answer counts twice its time), over the instances of
+        a method and d, optionally with t*n within [cells_min, cells_max].
+        """
+        query = ("SELECT solver, count(*), sum(outcome IN ('SAT', 'UNSAT')),"
+                 " avg(CASE WHEN outcome IN ('SAT', 'UNSAT') THEN time ELSE 2 * time END)"
+                 ' FROM solver_runs WHERE method = ? AND d = ?')
+        args = [method, d]
+        if cells_min is not None:
+            query += ' AND t * n BETWEEN ? AND ?'
+            args += [cells_min, cells_max]
+        query += ' GROUP BY solver'
+        return {solver: {'runs': runs, 'solved': solved, 'score': score}
+                for solver, runs, solved, score in self._connect().execute(query, args)}
+
+    def import_json(self, method, json_path):
+        """
+        Load a data_k_*_d_*.json file once; instances already in the store win.
+        """
+        connection = self._connect()
+        if connection.execute('SELECT 1 FROM imported WHERE path = ?',
+                              (os.path.abspath(json_path),)).fetchone():
+            return
+        try:
+            with open(json_path, 'r') as jsonFile:
+                data = json.load(jsonFile)
+        except FileNotFoundError:
+            return
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for obj in data:
+                info = {key: value for key, value in obj.items()
+                        if key not in ('k', 'd', 't', 'n', 'clauses', 'time', 'solution')}
+                connection.execute(
+                    'INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (method, obj['k'], obj['d'], obj['t'], obj['n'], obj.get('clauses'),
+                     obj.get('time'), json.dumps(obj['solution']),
+                     json.dumps(info) if info else None))
+            connection.execute('INSERT OR IGNORE INTO imported VALUES (?)',
+                               (os.path.abspath(json_path),))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def export_json(self, method, k, d, json_path):
+        """
+        Write the records of one (method, k, d) as data_k_*_d_*.json, plus its
+        .overleaf table (greatest n with a solution for each t).
+        """
+        data = self.records(method, k, d)
+        with open(json_path, 'w') as jsonFile:
+            opts = jsbeautifier.default_options()
+            opts.indent_size = 2
+            jsonFile.write(jsbeautifier.beautify(json.dumps(data), opts))
+
+        results = {}
+        for entry in data:
+            sol = entry['solution']
+            if isinstance(sol, list) and len(sol) > 0:
+                results[entry['t']] = max(results.get(entry['t'], 0), entry['n'])
+        with open(json_path.replace('.json', '.overleaf'), 'w') as f:
+            f.write("\tt   &   n\n")
+            for t in sorted(results.keys()):
+                f.write(f"\t{t:<4d}&{results[t]:4d}  \\\\\n")
+
+    def export_all(self, output_folder, method=None):
+        """
+        Export every (method, k, d) in the store under output_folder/<method>/.
+        """
+        query = 'SELECT DISTINCT method, k, d FROM results'
+        args = []
+        if method is not None:
+            query += ' WHERE method = ?'
+            args.append(method)
+        for method_name, k, d in self._connect().execute(query, args).fetchall():
+            folder = os.path.join(output_folder, method_name)
+            os.makedirs(folder, exist_ok=True)
+            json_path = os.path.join(folder, f"data_k_{k}_d_{d}.json")
+            self.export_json(method_name, k, d, json_path)
+            print(f"Exported {json_path}")
+
+    def import_all(self, output_folder):
+        """
+        Import every output_folder/<method>/data_k_*_d_*.json not imported yet.
+        """
+        pattern = re.compile(r"data_k_(\d+)_d_(\d+)\.json$")
+        for method_name in sorted(os.listdir(output_folder)):
+            folder = os.path.join(output_folder, method_name)
+            if not method_name.startswith('CreateClauses') or not os.path.isdir(folder):
+                continue
+            for fname in sorted(os.listdir(folder)):
+                if pattern.match(fname):
+                    self.import_json(method_name, os.path.join(folder, fname))
+
+
+if __name__ == '__main__':
+    # python store.py export [CreateClausesMethodName]
+    # python store.py import
+    store = ResultStore(os.path.join('cffdata', 'results.sqlite'))
+    if len(sys.argv) in (2, 3) and sys.argv[1] == 'export':
+        store.export_all('cffdata', sys.argv[2] if len(sys.argv) == 3 else None)
+    elif len(sys.argv) == 2 and sys.argv[1] == 'import':
+        store.import_all('cffdata')
+    else:
+        print("Usage:")
+        print("  python store.py export [CreateClausesMethodName]")
+        print("  python store.py import")
+        sys.exit(1)